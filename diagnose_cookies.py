@@ -1,6 +1,11 @@
 # diagnose_cookies.py
 # Simple cookie file validator used by the workflow.
-import json, sys, os
+import sys, os
+
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
 
 paths = [
     "data/www.instagram.com.cookies.json",
@@ -12,16 +17,23 @@ for p in paths:
     if not os.path.exists(p):
         continue
     try:
-        with open(p, encoding="utf-8") as fh:
-            obj = json.load(fh)
+        with open(p, "rb") as fh:
+            obj = json_loads(fh.read())
         if isinstance(obj, list):
             print(f"Parsed cookie file: {p} (entries: {len(obj)})")
             names = [c.get("name") for c in obj[:20]]
             print("Cookie names (sample up to 20):", names)
-            # quick checks
-            keys = {c.get("name") for c in obj if isinstance(c, dict)}
-            for required in ("sessionid", "ds_user_id", "csrftoken"):
-                print(required, "present:", required in keys)
+            # quick checks: one pass, stop as soon as every required name is seen
+            required = ("sessionid", "ds_user_id", "csrftoken")
+            found = set()
+            for c in obj:
+                n = c.get("name") if isinstance(c, dict) else None
+                if n in required:
+                    found.add(n)
+                    if len(found) == len(required):
+                        break
+            for r in required:
+                print(r, "present:", r in found)
             sys.exit(0)
         else:
             print(f"Found JSON but not a list at {p}, type={type(obj)}")
@@ -0,0 +1,29 @@
+#!/usr/bin/env bash
+# launch_shared_chromium.sh
+# Starts one long-lived Chromium with the DevTools protocol exposed so several
+# scraper runs can attach to it over CDP instead of launching their own browser.
+# Usage: ./launch_shared_chromium.sh            (port 9222)
+#        CDP_PORT=9333 CHROMIUM=chromium-browser ./launch_shared_chromium.sh
+set -euo pipefail
+
+CHROMIUM="${CHROMIUM:-chromium}"
+CDP_PORT="${CDP_PORT:-9222}"
+PROFILE_DIR="${PROFILE_DIR:-$(mktemp -d)}"
+
+echo "Starting $CHROMIUM with CDP on ws://127.0.0.1:$CDP_PORT (profile: $PROFILE_DIR)"
+exec "$CHROMIUM" \
+  --headless=new \
+  --no-sandbox \
+  --remote-debugging-address=127.0.0.1 \
+  --remote-debugging-port="$CDP_PORT" \
+  --user-data-dir="$PROFILE_DIR" \
+  --no-first-run \
+  --disable-gpu \
+  --disable-dev-shm-usage \
+  --disable-extensions \
+  --disable-background-networking \
+  --disable-sync \
+  --mute-audio \
+  --blink-settings=imagesEnabled=false \
+  --disable-features=site-per-process \
+  about:blank
@@ -12,5 +12,99 @@ TEKS_TOMBOL_FOLLOWING = "following"
 
 SELECTOR_HEADER_PROFIL = "header"
 SELECTOR_DIALOG_POPUP = 'div[role="dialog"]'
+SELECTOR_BARIS_DIALOG = 'div[role="dialog"] a[href^="/"]'
 
-USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36"
\ No newline at end of file
+KELAS_NAMA_LENGKAP = frozenset({'x1lliihq', 'x193iq5w'})
+TEKS_BUKAN_NAMA = frozenset({'follow', 'following', 'followers'})
+
+# Sumber yang tidak pernah dibaca scraper; stylesheet tetap dimuat karena dialog butuh layout untuk digulir.
+TIPE_SUMBER_DIBLOKIR = frozenset({'image', 'media', 'font', 'manifest', 'texttrack', 'ping'})
+POLA_URL_TELEMETRI = ('/logging_client_events', '/ajax/bz', 'connect.facebook.net/', 'facebook.com/tr')
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36"
+
+# Mengembalikan [href_terakhir, [[href, nama_lengkap], ...]] untuk baris di dialog setelah
+# baris ber-href `hrefTerakhir`, dalam satu panggilan. Posisi dikunci pada href, bukan indeks:
+# Instagram menyisipkan baris sebelum spinner dan saran akun sehingga indeks lama bergeser.
+# Jika href itu tidak ada lagi (atau null), seluruh baris dibaca ulang.
+JS_EKSTRAK_PENGGUNA = """
+([sel, kelasNama, teksBukanNama, hrefTerakhir]) => {
+    const kelas = new Set(kelasNama);
+    const skip = new Set(teksBukanNama);
+    let containers = document.querySelectorAll(`${sel} div[style*="flex-direction"] > div`);
+    if (containers.length === 0) {
+        containers = document.querySelectorAll(`${sel} a[href^="/"]`);
+    }
+    const hrefDari = (container) => {
+        const link = container.matches('a[href^="/"]') ? container : container.querySelector('a[href^="/"]');
+        return link ? link.getAttribute('href') : null;
+    };
+    // dicari dari belakang: baris terakhir yang dibaca hampir selalu dekat ujung daftar
+    let mulai = 0;
+    if (hrefTerakhir) {
+        for (let i = containers.length - 1; i >= 0; i--) {
+            if (hrefDari(containers[i]) === hrefTerakhir) { mulai = i + 1; break; }
+        }
+    }
+    const rows = [];
+    let terakhir = hrefTerakhir;
+    for (let i = mulai; i < containers.length; i++) {
+        const container = containers[i];
+        const href = hrefDari(container);
+        if (!href) continue;
+        terakhir = href;
+        const username = href.split('/').filter(Boolean)[0] || '';
+        let namaLengkap = '';
+        for (const span of container.querySelectorAll('span')) {
+            // textContent tidak memaksa layout seperti innerText, padahal dialog terus berubah saat digulir
+            const text = (span.textContent || '').trim();
+            if (!text || text === username) continue;
+            let kelasCocok = false;
+            for (const token of span.classList) {
+                if (kelas.has(token)) { kelasCocok = true; break; }
+            }
+            if (kelasCocok ||
+                (text.length > 2 && text.length <= 60 && text[0] !== '@' &&
+                 text[text.length - 1] !== 'K' && !skip.has(text.toLowerCase()))) {
+                namaLengkap = text;
+                break;
+            }
+        }
+        rows.push([href, namaLengkap]);
+    }
+    return [terakhir, rows];
+}
+"""
+
+# Menggulir kontainer daftar di dialog sekaligus ke bawah (tanpa animasi smooth).
+JS_GULIR_DIALOG = """
+(sel) => {
+    const dialog = document.querySelector(sel);
+    if (!dialog) return;
+    const scrollableDiv = dialog.querySelector('div[style*="overflow-y: auto"]') ||
+                          dialog.querySelector('div[style*="overflow: auto"]') ||
+                          dialog.querySelector('div[style*="overflow-y: scroll"]') ||
+                          dialog.querySelector('div[style*="max-height"]') ||
+                          dialog;
+    scrollableDiv.scrollBy({top: 1e6, behavior: 'instant'});
+}
+"""
+
+# Objek berisi JS_EKSTRAK_PENGGUNA dan JS_GULIR_DIALOG yang dikompilasi sekali lewat
+# page.evaluate_handle; tiap putaran scroll cukup memanggil api.ekstrak / api.gulir.
+JS_API_DIALOG = "() => ({ ekstrak: " + JS_EKSTRAK_PENGGUNA + ", gulir: " + JS_GULIR_DIALOG + " })"
+
+# Memasang MutationObserver yang menyimpan jumlah tautan di dialog ke window.__igCount,
+# sehingga polling cukup membaca satu angka tanpa query ulang DOM.
+JS_PASANG_PENGHITUNG = """
+(sel) => {
+    const root = document.querySelector(sel);
+    if (!root) return 0;
+    const hitung = () => { window.__igCount = root.querySelectorAll('a[href^="/"]').length; };
+    if (window.__igObserver) window.__igObserver.disconnect();
+    window.__igObserver = new MutationObserver(hitung);
+    window.__igObserver.observe(root, {childList: true, subtree: true});
+    hitung();
+    return window.__igCount;
+}
+"""
\ No newline at end of file
@@ -1,25 +1,78 @@
+import asyncio
 import logging
-import time
+import os
 import sys
 import random
+import re
 import csv
 import signal
 
-from playwright.sync_api import sync_playwright
+from playwright.async_api import async_playwright
 from playwright._impl._errors import Error as PlaywrightError
 
-from . import konstanta
+from . import konstanta, utilitas
 
 logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s')
 
+UKURAN_BUFFER_CSV = 1 << 20
+
+# Username Instagram: huruf, angka, titik, dan garis bawah, maksimal 30 karakter
+_USERNAME_VALID = re.compile(r'\A[A-Za-z0-9._]{1,30}\Z').match
+
+# Angka pada tautan jumlah beserta sufiks singkatan opsional, mis. "1,234 followers",
+# "1.2K followers", "12,3 rb pengikut", "1,2 jt", "12,3 Tsd.", "1,5 Mio.". Sufiks hanya
+# cocok sebagai kata utuh, jadi "m" pada "1,234 mengikuti" bukan sufiks juta.
+_POLA_JUMLAH = re.compile(
+    r'(\d+(?:[.,]\d+)*)(?:\s*(ribu|rb|juta|jt|tsd|mio|mrd|mln|mil|[kmb])\.?(?![^\W\d_]))?',
+    re.IGNORECASE)
+
+# Pengali per sufiks (huruf kecil, tanpa titik)
+_PENGALI_SUFIKS = {
+    'k': 1000, 'rb': 1000, 'ribu': 1000, 'tsd': 1000, 'mil': 1000,
+    'm': 1000000, 'jt': 1000000, 'juta': 1000000, 'mio': 1000000, 'mln': 1000000,
+    'b': 1000000000, 'mrd': 1000000000,
+}
+
+# Jumlah pasti: angka polos atau dikelompokkan per tiga digit ("1,234", "1.234.567")
+_ANGKA_PASTI = re.compile(r'\d{1,3}(?:[.,]\d{3})*|\d+').fullmatch
+
+
+# Menggagalkan request gambar, media, font, dan telemetri yang tidak dibutuhkan scraping
+_blokir_sumber_berat = utilitas.buat_pemblokir_sumber(konstanta.TIPE_SUMBER_DIBLOKIR, konstanta.POLA_URL_TELEMETRI)
+
+
+def _parse_jumlah(teks: str):
+    """
+    Mengubah teks jumlah menjadi (int, pasti) dengan satu pencarian regex, atau (None, False).
+
+    Hasilnya pasti hanya untuk angka tanpa sufiks yang polos atau dikelompokkan per
+    tiga digit; titik dan koma di situ adalah pemisah ribuan. Dengan sufiks (K, rb, jt,
+    Tsd., Mio., ...) pemisah terakhir dianggap desimal ("1.2K" -> 1200, bukan 12000) dan
+    hasilnya hanya perkiraan. Angka tanpa sufiks yang tidak dikelompokkan per tiga digit
+    ("12,3") tidak bisa ditafsirkan dan menghasilkan (None, False).
+    """
+    m = _POLA_JUMLAH.search(teks or "")
+    if not m:
+        return None, False
+    angka, sufiks = m.groups()
+    if not sufiks:
+        if _ANGKA_PASTI(angka):
+            return int(angka.replace(',', '').replace('.', '')), True
+        return None, False
+    i = max(angka.rfind('.'), angka.rfind(','))
+    if i >= 0:
+        angka = angka[:i].replace('.', '').replace(',', '') + '.' + angka[i + 1:]
+    return round(float(angka) * _PENGALI_SUFIKS[sufiks.lower()]), False
+
 class PengikisInstagram:
     """
     Kelas untuk mengotomatisasi proses scraping data followers atau
     following dari sebuah akun Instagram.
     """
 
-    def __init__(self, target_username: str, mode_kikis: str, file_cookie: str) -> None:
+    def __init__(self, target_username: str, mode_kikis: str, file_cookie: str,
+                 cdp_endpoint: str = None) -> None:
         """
         Inisialisasi objek PengikisInstagram.
 
@@ -27,19 +80,40 @@ class PengikisInstagram:
             target_username: Username akun Instagram yang akan dikikis.
             mode_kikis: Mode operasi ('followers' atau 'following').
             file_cookie: Path menuju file cookie JSON.
+            cdp_endpoint: Endpoint CDP dari Chromium yang sudah berjalan (opsional).
         """
         self.target_username = target_username
         self.mode_kikis = mode_kikis.lower()
         self.file_cookie = file_cookie
-        self.hasil_scrape = []
+        self.hasil_scrape = {}
         self.output_file = None
+        self._href_terakhir = None
+        self._api_dialog = None
+        self._tautan_daftar = None
+        self._file_csv = None
+        self._penulis_csv = None
         self._konfigurasi_mode()
 
+        self._cdp_endpoint = cdp_endpoint
         self.playwright = None
         self.browser = None
+        self.context = None
         self.page = None
 
-        signal.signal(signal.SIGINT, self._signal_handler)
+    @classmethod
+    def attach(cls, cdp_endpoint: str, target_username: str, mode_kikis: str,
+               file_cookie: str) -> "PengikisInstagram":
+        """
+        Membuat pengikis yang memakai Chromium bersama melalui CDP
+        alih-alih meluncurkan browser baru untuk setiap target.
+
+        Args:
+            cdp_endpoint: Endpoint CDP, misal 'http://127.0.0.1:9222'.
+            target_username: Username akun Instagram yang akan dikikis.
+            mode_kikis: Mode operasi ('followers' atau 'following').
+            file_cookie: Path menuju file cookie JSON.
+        """
+        return cls(target_username, mode_kikis, file_cookie, cdp_endpoint=cdp_endpoint)
 
     def _konfigurasi_mode(self) -> None:
         """Mengatur path URL dan teks tombol berdasarkan mode yang dipilih."""
@@ -54,15 +128,23 @@ class PengikisInstagram:
 
     def jalankan(self) -> list:
         """Memulai dan menjalankan seluruh alur proses scraping."""
-        with sync_playwright() as p:
+        return asyncio.run(self.jalankan_async())
+
+    async def jalankan_async(self) -> list:
+        """Versi asynchronous dari jalankan(), untuk dipakai di dalam event loop."""
+        handler_sebelumnya = signal.signal(signal.SIGINT, lambda signum, frame: self._signal_handler())
+        self._buka_file_csv()
+        berhasil = False
+        async with async_playwright() as p:
             self.playwright = p
             try:
-                self._buka_browser()
-                self._login_dengan_cookie()
-                self._navigasi_ke_target()
-                self._buka_popup_daftar()
-                self._gulir_dan_muat_data()
-                self._ekstrak_data_pengguna()
+                await self._buka_browser()
+                await self._login_dengan_cookie()
+                await self._navigasi_ke_target()
+                await self._buka_popup_daftar()
+                await self._gulir_dan_muat_data()
+                await self._ekstrak_data_pengguna()
+                berhasil = True
 
                 if self.hasil_scrape:
                     logging.info(f"Scraping berhasil! Mengumpulkan {len(self.hasil_scrape)} data.")
@@ -77,102 +159,119 @@ class PengikisInstagram:
                 logging.info("Mencoba menyimpan data yang sudah dikumpulkan...")
                 self._auto_save_data()
             finally:
-                self.tutup()
+                signal.signal(signal.SIGINT, handler_sebelumnya)
+                self._tutup_file_csv(berhasil)
+                await self.tutup()
 
-        return self.hasil_scrape
+        return list(self.hasil_scrape.items())
 
-    def _buka_browser(self) -> None:
-        """Membuka browser Chromium dan membuat halaman baru."""
-        logging.info("Membuka browser...")
-        self.browser = self.playwright.chromium.launch(headless=False, slow_mo=100)
-        context = self.browser.new_context(
+    async def _buka_browser(self) -> None:
+        """Membuka browser Chromium (atau menyambung ke CDP) dan membuat halaman baru."""
+        if self._cdp_endpoint:
+            logging.info(f"Menyambung ke browser bersama di {self._cdp_endpoint}...")
+            self.browser = await self.playwright.chromium.connect_over_cdp(self._cdp_endpoint)
+        else:
+            logging.info("Membuka browser...")
+            self.browser = await self.playwright.chromium.launch(headless=False)
+        self.context = await self.browser.new_context(
             storage_state=self.file_cookie,
-            user_agent=konstanta.USER_AGENT
+            user_agent=konstanta.USER_AGENT,
+            # Request dari service worker tidak melewati route pemblokir di bawah
+            service_workers="block"
         )
-        self.page = context.new_page()
+        await self.context.route("**/*", _blokir_sumber_berat)
+        self.page = await self.context.new_page()
 
-    def _login_dengan_cookie(self) -> None:
-        """Melakukan navigasi ke halaman utama Instagram untuk memvalidasi sesi login."""
-        logging.info("Mencoba login menggunakan sesi dari file cookie...")
-        for attempt in range(5):
+    async def _goto_dengan_retry(self, url: str, percobaan: int = 5) -> None:
+        """
+        Navigasi ke URL dan hanya menunggu sampai navigasi di-commit,
+        dengan exponential backoff (maksimal 30 detik) di antara percobaan.
+
+        Args:
+            url: URL tujuan.
+            percobaan: Jumlah maksimal percobaan.
+        """
+        for attempt in range(percobaan):
             try:
-                self.page.goto(konstanta.URL_DASAR, timeout=60000, wait_until="domcontentloaded")
-                break
+                await self.page.goto(url, timeout=15000, wait_until="commit")
+                return
             except Exception as e:
                 logging.warning(f"Attempt {attempt + 1} failed: {e}")
-                if attempt == 4:
+                if attempt == percobaan - 1:
                     raise e
-                time.sleep(5)
+                await asyncio.sleep(min(2 ** attempt, 30))
+
+    async def _login_dengan_cookie(self) -> None:
+        """Melakukan navigasi ke halaman utama Instagram untuk memvalidasi sesi login."""
+        logging.info("Mencoba login menggunakan sesi dari file cookie...")
+        await self._goto_dengan_retry(konstanta.URL_DASAR)
         
         logging.info("Berhasil memuat halaman utama Instagram.")
 
-    def _navigasi_ke_target(self) -> None:
+    async def _navigasi_ke_target(self) -> None:
         """Membuka halaman profil dari target username."""
         url_target = f"{konstanta.URL_DASAR}/{self.target_username}/"
         logging.info(f"Navigasi ke profil target: {url_target}")
-        self.page.goto(url_target, timeout=60000)
+        await self._goto_dengan_retry(url_target)
 
         try:
-            self.page.wait_for_selector(konstanta.SELECTOR_HEADER_PROFIL, timeout=15000)
+            await self.page.wait_for_selector(konstanta.SELECTOR_HEADER_PROFIL, timeout=15000)
             logging.info("Header profil berhasil dimuat")
-            
-            time.sleep(5)
         except Exception as e:
             logging.warning(f"Warning: {e}")
-            logging.info("Mencoba lanjutkan tanpa menunggu networkidle...")
-            time.sleep(5)
+            logging.info("Mencoba lanjutkan tanpa menunggu header profil...")
 
         logging.info(f"Berhasil memuat profil {self.target_username}.")
 
-    def _buka_popup_daftar(self) -> None:
+    async def _buka_popup_daftar(self) -> None:
         """Menemukan dan mengklik tombol followers/following untuk membuka dialog."""
         logging.info(f"Mencari dan mengklik tautan '{self.teks_tombol}'...")
         
-        link_selectors = [
-            f'a[href*="{self.url_path}"]',
-            f'//a[contains(@href, "{self.url_path}")]',
-            f'//a[contains(text(), "{self.teks_tombol}")]'
-        ]
-        
-        clicked = False
-        for selector in link_selectors:
-            try:
-                if selector.startswith('//'):
-                    element = self.page.locator(selector).first
-                else:
-                    element = self.page.locator(selector).first
-
-                element.click(timeout=5000)
-                clicked = True
-                logging.info(f"Berhasil klik {self.teks_tombol} dengan selector: {selector}")
-                break
+        # Satu selector CSS gabungan (tanpa pencocokan teks lewat XPath): ditunggu sekali,
+        # kandidat mana pun yang muncul duluan yang diklik.
+        tautan = self.page.locator(
+            f'a[href$="{self.url_path}"], header a[href*="{self.url_path}"]'
+        ).first
+        # Dipakai ulang untuk membaca jumlah di _gulir_dan_muat_data
+        self._tautan_daftar = tautan
 
-            except Exception as e:
-                logging.warning(f"Selector {selector} gagal: {e}")
-                continue
-        
-        if not clicked:
-            logging.error(f"Gagal menemukan link {self.teks_tombol} secara otomatis")
+        try:
+            await tautan.click(timeout=10000)
+            logging.info(f"Berhasil klik {self.teks_tombol}")
+        except PlaywrightError as e:
+            logging.error(f"Gagal menemukan link {self.teks_tombol} secara otomatis: {e}")
             raise PlaywrightError(f"Tidak dapat menemukan tombol {self.teks_tombol}")
         
         logging.info(f"Menunggu pop-up {self.teks_tombol} muncul...")
         try:
-            self.page.wait_for_selector(konstanta.SELECTOR_DIALOG_POPUP, timeout=15000)
+            await self.page.wait_for_selector(konstanta.SELECTOR_DIALOG_POPUP, timeout=15000)
             logging.info(f"Pop-up {self.teks_tombol} muncul.")
         except:
             logging.error("Pop-up tidak ditemukan")
             raise PlaywrightError(f"Pop-up {self.teks_tombol} tidak muncul")
 
-    def _gulir_dan_muat_data(self) -> None:
+    async def _gulir_dan_muat_data(self) -> None:
         """Menggulir dialog untuk memuat semua data pengguna."""
         logging.info(f"Memulai proses menggulir untuk memuat daftar {self.teks_tombol}...")
         
         logging.info(f"Menunggu data {self.teks_tombol} dimuat...")
-        time.sleep(10)
+        # Lanjut begitu baris pertama muncul, bukan jeda tetap 10 detik; dialog yang kosong
+        # (akun privat/tanpa followers) tetap diteruskan ke loop gulir setelah timeout
+        try:
+            await self.page.wait_for_selector(konstanta.SELECTOR_BARIS_DIALOG, timeout=10000)
+        except PlaywrightError:
+            logging.info(f"Belum ada {self.teks_tombol} yang tampil di dialog")
         
+        jumlah_total = None
         try:
-            count_text = self.page.locator(f'a[href*="{self.url_path}"]').inner_text()
+            # Locator tautan yang sama dengan yang diklik; timeout pendek agar tautan yang
+            # hilang tidak menunggu default 30 detik
+            count_text = await self._tautan_daftar.inner_text(timeout=2000)
             logging.info(f"Jumlah {self.teks_tombol}: {count_text}")
+            jumlah, pasti = _parse_jumlah(count_text)
+            # Jumlah yang dibulatkan (1.2K) tidak dipakai untuk berhenti lebih awal
+            if pasti:
+                jumlah_total = jumlah
         except:
             logging.info(f"Tidak dapat mengambil jumlah {self.teks_tombol}")
         
@@ -180,54 +279,27 @@ class PengikisInstagram:
         scroll_attempts = 0
         previous_count = 0
         max_scrolls = 10000
-        
-        username_terproses = set()
+        tugas_ekstrak = None
+
+        await self.page.evaluate(konstanta.JS_PASANG_PENGHITUNG, dialog_selector)
+        self._api_dialog = await self.page.evaluate_handle(konstanta.JS_API_DIALOG)
 
         while scroll_attempts < max_scrolls:
             try:
-                self.page.evaluate(f"""
-                    const dialog = document.querySelector('{dialog_selector}');
-                    if (dialog) {{
-                        // Cari elemen scrollable yang tepat
-                        const scrollableDiv = dialog.querySelector('div[style*="overflow-y: auto"]') || 
-                                             dialog.querySelector('div[style*="overflow: auto"]') ||
-                                             dialog.querySelector('div[style*="overflow-y: scroll"]') ||
-                                             dialog.querySelector('div[style*="max-height"]');
-                        
-                        if (scrollableDiv) {{
-                            // Scroll dengan smooth behavior
-                            scrollableDiv.scrollBy({{
-                                top: scrollableDiv.scrollHeight,
-                                behavior: 'smooth'
-                            }});
-                        }} else {{
-                            // Fallback ke dialog utama
-                            dialog.scrollTop = dialog.scrollHeight;
-                        }}
-                    }}
-                """)
-                
-                self.page.keyboard.press('PageDown')
-                self.page.keyboard.press('PageDown')
-                self.page.keyboard.press('End')
-                self.page.mouse.wheel(0, 2000)
-                
-                try:
-                    self.page.click(f'{dialog_selector}')
-                    self.page.keyboard.press('PageDown')
-                except:
-                    pass
-                
+                await self._api_dialog.evaluate("(api, sel) => api.gulir(sel)", dialog_selector)
             except Exception as e:
                 logging.error(f"Error saat scroll: {e}")
             
-            time.sleep(random.uniform(2, 4))
+            await asyncio.sleep(random.uniform(1.0, 1.5))
             
-            current_count = self.page.locator(f'{dialog_selector} a[href^="/"]').count()
+            current_count = await self.page.evaluate("window.__igCount || 0")
             logging.info(f"{self.teks_tombol.capitalize()} dimuat: {current_count}")
             
             if current_count > previous_count:
-                self._ekstrak_data_real_time(username_terproses)
+                # Ekstraksi berjalan bersamaan dengan scroll dan jeda berikutnya
+                if tugas_ekstrak:
+                    await tugas_ekstrak
+                tugas_ekstrak = asyncio.create_task(self._ekstrak_data_real_time())
             
             if current_count == previous_count:
                 logging.info(f"Tidak ada {self.teks_tombol} baru yang dimuat")
@@ -235,7 +307,7 @@ class PengikisInstagram:
                     scroll_attempts += 1
                     
                     try:
-                        self.page.evaluate(f"""
+                        await self.page.evaluate(f"""
                             // Scroll dengan metode yang berbeda
                             const dialog = document.querySelector('{dialog_selector}');
                             if (dialog) {{
@@ -260,18 +332,26 @@ class PengikisInstagram:
             if current_count > 100000:
                 logging.info(f"Sudah memuat {current_count} {self.teks_tombol}, berhenti scroll")
                 break
+
+            # Semua akun pada jumlah di profil sudah terekstrak: tidak perlu menunggu stagnan
+            if jumlah_total and len(self.hasil_scrape) >= jumlah_total:
+                logging.info(f"Seluruh {jumlah_total} {self.teks_tombol} sudah diekstrak, berhenti scroll")
+                break
             
             if scroll_attempts % 10 == 0:
                 logging.info(f"Progress: {current_count} {self.teks_tombol} dimuat setelah {scroll_attempts} attempts")
         
+        if tugas_ekstrak:
+            await tugas_ekstrak
+
         logging.info("Proses menggulir selesai.")
         
-        logging.info("Menunggu sebelum mengambil data...")
-        time.sleep(5)
-        
-        self._ekstrak_data_real_time(username_terproses)
+        # Pass terakhir membaca seluruh dialog dari awal; baris yang sudah ada di
+        # hasil_scrape dilewati, jadi yang tertinggal di pass bertahap ikut terambil
+        self._href_terakhir = None
+        await self._ekstrak_data_real_time()
 
-    def _ekstrak_data_pengguna(self) -> None:
+    async def _ekstrak_data_pengguna(self) -> None:
         """Mengekstrak username dan nama lengkap dari dialog yang telah dimuat."""
         logging.info("Mengekstrak data pengguna dari dialog (final check)...")
         
@@ -280,8 +360,8 @@ class PengikisInstagram:
             return
         
         logging.info("Melakukan ekstraksi data manual...")
-        username_terproses = set()
-        self._ekstrak_data_real_time(username_terproses)
+        self._href_terakhir = None
+        await self._ekstrak_data_real_time()
         
         logging.info(f"Total {len(self.hasil_scrape)} data pengguna berhasil diekstrak.")
 
@@ -298,10 +378,10 @@ class PengikisInstagram:
 
         logging.info(f"Menyimpan {len(self.hasil_scrape)} data ke {nama_file}...")
         try:
-            with open(nama_file, 'w', newline='', encoding='utf-8') as f:
-                penulis = csv.writer(f)
+            with open(nama_file, 'w', newline='', encoding='utf-8', buffering=UKURAN_BUFFER_CSV) as f:
+                penulis = csv.writer(f, quoting=csv.QUOTE_MINIMAL)
                 penulis.writerow(['Username', 'Full Name'])
-                penulis.writerows(self.hasil_scrape)
+                penulis.writerows(self.hasil_scrape.items())
             logging.info(f"Data berhasil disimpan ke {nama_file}.")
         except IOError as e:
             logging.error(f"Gagal menyimpan file: {e}")
@@ -315,32 +395,82 @@ class PengikisInstagram:
         """
         self.output_file = output_file
 
+    def _path_partial(self) -> str:
+        """Path file _partial untuk output_file, mis. hasil.csv -> hasil_partial.csv."""
+        parts = self.output_file.rsplit('.', 1)
+        if len(parts) == 2:
+            return f"{parts[0]}_partial.{parts[1]}"
+        return f"{self.output_file}_partial"
+
+    def _buka_file_csv(self) -> None:
+        """
+        Membuka file _partial agar setiap baris baru langsung ditulis saat scroll.
+
+        output_file sendiri baru diganti setelah scraping selesai, sehingga hasil lama
+        tidak terpotong oleh run yang gagal di tengah jalan.
+        """
+        if not self.output_file:
+            return
+        path_partial = self._path_partial()
+        try:
+            self._file_csv = open(path_partial, 'w', newline='', encoding='utf-8', buffering=UKURAN_BUFFER_CSV)
+            self._penulis_csv = csv.writer(self._file_csv, quoting=csv.QUOTE_MINIMAL)
+            self._penulis_csv.writerow(['Username', 'Full Name'])
+        except IOError as e:
+            logging.error(f"Gagal membuka file output {path_partial}: {e}")
+            self._file_csv = None
+            self._penulis_csv = None
+
+    def _tutup_file_csv(self, berhasil: bool = False) -> None:
+        """
+        Menutup file output yang ditulis secara bertahap.
+
+        Args:
+            berhasil: Jika True, file _partial menggantikan output_file; jika tidak,
+                file _partial dibiarkan sebagai salinan data yang sempat terkumpul.
+        """
+        if not self._file_csv:
+            return
+        self._file_csv.close()
+        self._file_csv = None
+        self._penulis_csv = None
+        path_partial = self._path_partial()
+        if not berhasil:
+            logging.info(f"Data yang sempat terkumpul disimpan di {path_partial}")
+            return
+        try:
+            os.replace(path_partial, self.output_file)
+            logging.info(f"Data berhasil disimpan ke {self.output_file}.")
+        except OSError as e:
+            logging.error(f"Gagal mengganti {self.output_file} dengan {path_partial}: {e}")
+
     def _signal_handler(self) -> None:
         """
         Handler untuk menangani sinyal interrupt (Ctrl+C).
         """
         logging.warning("\nProgram dihentikan oleh pengguna (Ctrl+C)")
         self._auto_save_data()
-        self.tutup()
+        # Browser ditutup oleh blok finally di jalankan_async saat program keluar
         sys.exit(0)
 
     def _auto_save_data(self):
         """
         Otomatis menyimpan data yang sudah dikumpulkan ke file CSV.
+
+        Jika file _partial sedang ditulis secara bertahap, cukup flush buffer-nya.
         """
-        if self.hasil_scrape and self.output_file:
-            parts = self.output_file.rsplit('.', 1)
-            if len(parts) == 2:
-                auto_save_file = f"{parts[0]}_partial.{parts[1]}"
-            else:
-                auto_save_file = f"{self.output_file}_partial"
-                
+        if self._file_csv:
+            self._file_csv.flush()
+            logging.info(f"Auto-save: {len(self.hasil_scrape)} {self.teks_tombol} sudah tersimpan di {self._path_partial()}")
+        elif self.hasil_scrape and self.output_file:
+            auto_save_file = self._path_partial()
+
             logging.info(f"Auto-save: Menyimpan {len(self.hasil_scrape)} data yang sudah dikumpulkan...")
             try:
-                with open(auto_save_file, 'w', newline='', encoding='utf-8') as f:
-                    penulis = csv.writer(f)
+                with open(auto_save_file, 'w', newline='', encoding='utf-8', buffering=UKURAN_BUFFER_CSV) as f:
+                    penulis = csv.writer(f, quoting=csv.QUOTE_MINIMAL)
                     penulis.writerow(['Username', 'Full Name'])
-                    penulis.writerows(self.hasil_scrape)
+                    penulis.writerows(self.hasil_scrape.items())
                 logging.info(f"Data berhasil disimpan ke {auto_save_file}")
                 logging.info(f"Total data yang tersimpan: {len(self.hasil_scrape)} {self.teks_tombol}")
             except IOError as e:
@@ -350,76 +480,57 @@ class PengikisInstagram:
         else:
             logging.info("Tidak ada data yang dikumpulkan untuk disimpan")
 
-    def tutup(self):
+    async def tutup(self):
         """Menutup browser jika sedang berjalan."""
+        if self.context:
+            await self.context.close()
+            self.context = None
         if self.browser:
-            logging.info("Menutup browser.")
-            self.browser.close()
+            if self._cdp_endpoint:
+                logging.info("Memutus sambungan dari browser bersama.")
+            else:
+                logging.info("Menutup browser.")
+            await self.browser.close()
+            self.browser = None
     
-    def _ekstrak_data_real_time(self, username_terproses: set):
+    async def _ekstrak_data_real_time(self):
         """
         Ekstrak data pengguna secara real-time saat scroll.
-        
-        Args:
-            username_terproses: Set untuk menghindari duplikasi username
+
+        Seluruh baris baru dibaca dalam satu panggilan evaluate agar tidak
+        terjadi round-trip CDP untuk setiap elemen. Hanya container setelah
+        baris ber-href _href_terakhir yang diproses, dan username yang sudah
+        ada di hasil_scrape dilewati.
         """
         try:
-            containers = self.page.locator(f'{konstanta.SELECTOR_DIALOG_POPUP} div[style*="flex-direction"] > div')
-            jumlah_container = containers.count()
+            argumen = [
+                konstanta.SELECTOR_DIALOG_POPUP,
+                list(konstanta.KELAS_NAMA_LENGKAP),
+                list(konstanta.TEKS_BUKAN_NAMA),
+                self._href_terakhir,
+            ]
+            if self._api_dialog:
+                href_terakhir, baris = await self._api_dialog.evaluate("(api, arg) => api.ekstrak(arg)", argumen)
+            else:
+                href_terakhir, baris = await self.page.evaluate(konstanta.JS_EKSTRAK_PENGGUNA, argumen)
+        except Exception as e:
+            logging.warning(f"Error saat ekstraksi real-time: {e}")
+            return
 
-            if jumlah_container == 0:
-                containers = self.page.locator(f'{konstanta.SELECTOR_DIALOG_POPUP} a[href^="/"]')
-                jumlah_container = containers.count()
+        self._href_terakhir = href_terakhir
 
-            for i in range(jumlah_container):
-                container = containers.nth(i)
-                try:
-                    username = ""
-                    try:
-                        link = container.locator('a[href^="/"]').first
-                        href = link.get_attribute('href')
-                        username = href.replace('/', '') if href else ""
-                    except:
-                        continue
-                    
-                    if not username or username in username_terproses:
-                        continue
-                    
-                    nama_lengkap = ""
-                    try:
-                        spans = container.locator('span').all()
-                        
-                        for span in spans:
-                            try:
-                                text = span.inner_text().strip()
-                                if not text or text == username:
-                                    continue
-                                
-                                span_class = span.get_attribute('class') or ""
-                                
-                                if ('x1lliihq' in span_class or 
-                                    'x193iq5w' in span_class or
-                                    (len(text) > 2 and 
-                                    not text.startswith('@') and 
-                                    not text.endswith('K') and
-                                    not text.lower() in ['follow', 'following', 'followers'])):
-                                    nama_lengkap = text
-                                    break
-                                    
-                            except:
-                                continue
-                                
-                    except Exception as e:
-                        logging.debug(f"Error mengambil full name untuk {username}: {e}")
-                    
-                    if username and username.strip() != "" and not (' ' in username or len(username) > 30):
-                        logging.info(f"Diekstrak {self.teks_tombol} {len(self.hasil_scrape) + 1}: {username} - {nama_lengkap}")
-                        self.hasil_scrape.append((username, nama_lengkap))
-                        username_terproses.add(username)
+        baru = []
+        for href, nama_lengkap in baris:
+            username = href.strip('/').split('/', 1)[0] if href else ""
 
-                except Exception as e:
-                    logging.debug(f"Gagal memproses item ke-{i}: {e}")
-                    continue
-                    
-        except Exception as e:
-            logging.warning(f"Error saat ekstraksi real-time: {e}")
\ No newline at end of file
+            if username in self.hasil_scrape or not _USERNAME_VALID(username):
+                continue
+
+            logging.info(f"Diekstrak {self.teks_tombol} {len(self.hasil_scrape) + 1}: {username} - {nama_lengkap}")
+            self.hasil_scrape[username] = nama_lengkap
+            baru.append((username, nama_lengkap))
+
+        # Satu panggilan writerows per batch, di thread terpisah agar event loop tetap
+        # melayani scroll selama penulisan CSV
+        if baru and self._penulis_csv:
+            await asyncio.to_thread(self._penulis_csv.writerows, baru)
\ No newline at end of file
@@ -1,3 +1,19 @@
+import asyncio
+import os
+import time
+
+_COOKIE_DASAR = {
+    "domain": ".instagram.com",
+    "path": "/",
+    "expires": -1,
+    "httpOnly": False,
+    "secure": True,
+    "sameSite": "None"
+}
+
+_COOKIE_HTTP_ONLY = frozenset({'sessionid', 'csrftoken'})
+
+
 def konversi_cookie_string(cookie_string: str) -> dict:
     """
     Mengonversi cookie dalam format string mentah ke format JSON
@@ -13,31 +29,137 @@ def konversi_cookie_string(cookie_string: str) -> dict:
     if not cookie_string:
         return {"cookies": [], "origins": []}
     
-    pasangan_cookie = cookie_string.split(";")
-
-    for pasangan in pasangan_cookie:
-        if "=" in pasangan:
-            nama, nilai = pasangan.strip().split("=", 1)
-
-            cookie = {
-                "name": nama.strip(),
-                "value": nilai.strip(),
-                "domain": ".instagram.com",
-                "path": "/",
-                "expires": -1,
-                "httpOnly": False,
-                "secure": True,
-                "sameSite": "None"
-            }
-
-            if nama.strip() in ['sessionid', 'csrftoken']:
-                cookie["httpOnly"] = True
-            
-            cookies.append(cookie)
+    for pasangan in cookie_string.split(";"):
+        nama, sep, nilai = pasangan.partition("=")
+        if not sep:
+            continue
+
+        cookie = _COOKIE_DASAR.copy()
+        cookie["name"] = nama.strip()
+        cookie["value"] = nilai.strip()
+
+        if cookie["name"] in _COOKIE_HTTP_ONLY:
+            cookie["httpOnly"] = True
+        
+        cookies.append(cookie)
     
     return {
         "cookies": cookies,
         "origins": [
             
         ]
-    }
\ No newline at end of file
+    }
+
+
+def state_masih_segar(path_state: str, path_cookie) -> bool:
+    """
+    Memeriksa apakah storage state tersimpan masih bisa dipakai.
+
+    State hanya dipercaya selama lebih baru dari setiap file cookie asalnya,
+    sehingga cookie yang diganti selalu mengalahkan state lama.
+
+    Args:
+        path_state: Path file storage state Playwright.
+        path_cookie: Daftar path file cookie yang mungkin dipakai.
+
+    Returns:
+        True jika state ada dan tidak lebih tua dari file cookie mana pun.
+    """
+    if not os.path.exists(path_state):
+        return False
+    mtime_state = os.path.getmtime(path_state)
+    return all(not os.path.exists(p) or os.path.getmtime(p) <= mtime_state for p in path_cookie)
+
+
+def hapus_state(path_state: str) -> None:
+    """
+    Menghapus storage state setelah halaman login terdeteksi, agar run berikutnya
+    (dari skrip mana pun yang berbagi file ini) kembali memakai cookie.
+
+    Args:
+        path_state: Path file storage state Playwright.
+    """
+    # Target lain yang berjalan bersamaan mungkin sudah menghapusnya
+    try:
+        os.remove(path_state)
+    except FileNotFoundError:
+        pass
+
+
+def buat_pemblokir_sumber(tipe_diblokir, pola_url):
+    """
+    Membuat handler route yang menggagalkan request yang tidak pernah dibaca scraper.
+
+    Args:
+        tipe_diblokir: Kumpulan resource_type yang digagalkan (gambar, font, ...).
+        pola_url: Potongan URL telemetri yang juga digagalkan.
+
+    Returns:
+        Coroutine function untuk context.route("**/*", ...).
+    """
+    async def blokir(route) -> None:
+        request = route.request
+        if request.resource_type in tipe_diblokir or any(pola in request.url for pola in pola_url):
+            await route.abort()
+        else:
+            await route.continue_()
+    return blokir
+
+
+BATAS_HTML_DEBUG = 512 * 1024
+_jumlah_debug = 0
+
+
+def tulis_file_debug(path: str, data) -> None:
+    """Menulis satu artefak debug (str sebagai UTF-8, atau bytes apa adanya)."""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    with open(path, "wb") as fh:
+        fh.write(data)
+
+
+async def simpan_debug(page, nama: str, folder: str = "data") -> None:
+    """
+    Menyimpan HTML dan screenshot halaman ke <folder>/debug_<nama>_<ts>.{html,png}.
+
+    HTML diserialisasi sementara screenshot dirender, lalu kedua file ditulis di
+    thread terpisah; masing-masing boleh gagal sendiri. Screenshot hanya viewport
+    kecuali SCREENSHOT_FULL_PAGE=true, HTML dipotong di BATAS_HTML_DEBUG karakter,
+    dan hanya DEBUG_MAX_ARTIFACTS (default 20) kegagalan pertama per proses yang
+    disimpan. DEBUG_ARTIFACTS=0 mematikannya.
+
+    Args:
+        page: Halaman Playwright yang gagal.
+        nama: Username/target untuk nama file.
+        folder: Folder tujuan.
+    """
+    global _jumlah_debug
+    if os.environ.get("DEBUG_ARTIFACTS", "1") != "1":
+        return
+    if _jumlah_debug >= int(os.environ.get("DEBUG_MAX_ARTIFACTS", "20")):
+        print("Debug artifact limit reached, not saving for", nama)
+        return
+    _jumlah_debug += 1
+    # Resolusi ns: retry dalam detik yang sama tidak saling menimpa
+    ts = time.time_ns()
+    aman = nama.replace("/", "_")
+    html, png = await asyncio.gather(
+        page.content(),
+        page.screenshot(full_page=os.environ.get("SCREENSHOT_FULL_PAGE", "false") == "true"),
+        return_exceptions=True)
+    if isinstance(html, str):
+        html = html[:BATAS_HTML_DEBUG]
+    tersimpan = []
+    for data, ext in ((html, "html"), (png, "png")):
+        if isinstance(data, BaseException):
+            print("Failed to save debug %s:" % ext, data)
+            continue
+        path = f"{folder}/debug_{aman}_{ts}.{ext}"
+        try:
+            await asyncio.to_thread(tulis_file_debug, path, data)
+        except Exception as e:
+            print("Failed to save debug %s:" % ext, e)
+            continue
+        tersimpan.append(path)
+    if tersimpan:
+        print("Saved debug artifacts for", nama, "->", ", ".join(tersimpan))
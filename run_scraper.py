@@ -78,7 +78,11 @@ jobs:
 
           # Validate with a small Python script written to a file (avoids YAML/heredoc issues)
           cat > validate_cookies.py <<'PY'
-import json, sys
+import sys
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
 paths = [
     "www.instagram.com.cookies.json",
     "data/www.instagram.com.cookies.json",
@@ -87,8 +91,8 @@ paths = [
 ok = False
 for p in paths:
     try:
-        with open(p, encoding="utf-8") as f:
-            data = json.load(f)
+        with open(p, "rb") as f:
+            data = json_loads(f.read())
         if isinstance(data, list):
             print("Parsed cookie file:", p, "entries:", len(data))
             print("Cookie names (sample up to 20):", [c.get("name") for c in data[:20]])
@@ -105,20 +109,33 @@ PY
       - name: Diagnostic: test cookies + fetch one profile (saves data/debug_diagnose.html)
         shell: bash
         run: |
-          python -m pip install --upgrade pip requests
+          python -m pip install --upgrade pip "httpx[http2]"
           cat > diag.py <<'PY'
-import json, os, sys, re, requests
+import os, sys, httpx
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
 paths = [
     "data/www.instagram.com.cookies.json",
     "www.instagram.com.cookies.json",
     "cookies/www.instagram.com.cookies.json",
 ]
+def page_title(html):
+    # parsed from everything buffered: the stream stops right after </title>, which on IG's
+    # large inline <head> can come well past the first few KB. None when there is no title
+    low = html.lower()
+    i = low.find(b"<title")
+    j = low.find(b">", i) if i >= 0 else -1
+    k = low.find(b"</title>", j) if j >= 0 else -1
+    return html[j+1:k].decode("utf-8", "replace").strip() if k >= 0 else None
+
 cookie_list = None
 for p in paths:
     if os.path.exists(p):
         try:
-            with open(p, encoding="utf-8") as f:
-                cookie_list = json.load(f)
+            with open(p, "rb") as f:
+                cookie_list = json_loads(f.read())
             print("Using cookie file:", p)
             break
         except Exception as e:
@@ -129,12 +146,7 @@ if not cookie_list:
     sys.exit(2)
 
 def to_dict(lst):
-    d = {}
-    for c in lst:
-        n = c.get("name"); v = c.get("value")
-        if n and v:
-            d[n] = v
-    return d
+    return {c["name"]: c["value"] for c in lst if c.get("name") and c.get("value")}
 
 cookie_dict = to_dict(cookie_list)
 print("Cookie keys (sample up to 20):", list(cookie_dict.keys())[:20])
@@ -146,21 +158,37 @@ headers = {
 test_user = "thepreetjohal"
 url = f"https://www.instagram.com/{test_user}/"
 print("GET", url)
+save_html = os.environ.get("DIAG_SAVE_HTML", "1") == "1"
+buf = bytearray()
 try:
-    r = requests.get(url, cookies=cookie_dict, headers=headers, timeout=30)
+    # one HTTP/2 client; more diagnostic GETs can share its connection
+    with httpx.Client(http2=True, timeout=30, cookies=cookie_dict, headers=headers, follow_redirects=True) as client, \
+            client.stream("GET", url) as r:
+        # a stream can only be iterated once, so the body drain resumes this same iterator
+        chunks = r.iter_bytes(chunk_size=8192)
+        for chunk in chunks:
+            buf += chunk
+            if b"</title>" in buf:
+                break
+        title = page_title(bytes(buf))
+        if save_html:
+            for chunk in chunks:
+                buf += chunk
 except Exception as e:
     print("Request failed:", e)
     sys.exit(3)
 print("HTTP status:", r.status_code)
-m = re.search(r"<title[^>]*>(.*?)</title>", r.text, re.I|re.S)
-title = m.group(1).strip() if m else ""
-print("Page title:", title[:200])
-os.makedirs("data", exist_ok=True)
-with open("data/debug_diagnose.html","w",encoding="utf-8") as fh:
-    fh.write(r.text)
-print("Saved data/debug_diagnose.html size:", len(r.text))
+print("Page title:", "(none found)" if title is None else title[:200])
+if save_html:
+    os.makedirs("data", exist_ok=True)
+    with open("data/debug_diagnose.html","wb") as fh:
+        fh.write(buf)
+    print("Saved data/debug_diagnose.html size:", len(buf))
 if r.status_code in (403,429):
     print("Blocked or rate-limited (status code)", r.status_code); sys.exit(4)
+if not title:
+    # without a (non-empty) title the login-page heuristic cannot run, so this is not a pass
+    print("No <title> in the response; cannot tell a profile from the login page."); sys.exit(6)
 if "Log in" in title or "Login" in title or "Sign up" in title:
     print("Heuristic: login page returned (cookies invalid or blocked)."); sys.exit(5)
 print("Diagnostic looks OK (profile page returned).")
@@ -200,6 +228,7 @@ PY
           name: ig-scraper-artifacts
           path: |
             data/**
+            !data/ig_state.json
             debug_*.png
             debug_*.html
             www.instagram.com.cookies.json
@@ -6,12 +6,39 @@ scrape_followers.py
 - Expects SINGLE_USERNAME env var or reads first username from usernames.txt
 - Opens profile, clicks Followers, scrolls modal to collect followers usernames
 - Saves CSV: data/followers_<username>.csv
+- Optional, off by default: with FETCH_PROFILE_INFO=1, also fetches biography / is_private of
+  every follower through the web_profile_info JSON endpoint (pooled requests.Session, keep-alive)
+  and writes username,biography,is_private instead of the plain username column
 - Saves debug artifacts on errors
+- TARGETS=a,b,c scrapes several accounts; TARGET_CONCURRENCY (default 1) of them run at once,
+  each in its own browser context, sharing one profile cache and CONCURRENCY lookup threads
 """
 
-import os, sys, json, time, csv, traceback
+import os, sys, json, time, csv, mmap, random, asyncio, sqlite3, logging, threading
 from pathlib import Path
-from playwright.sync_api import sync_playwright
+from contextlib import closing
+from operator import itemgetter
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from playwright.async_api import async_playwright, Error as PWError
+from pyinstadump.utilitas import buat_pemblokir_sumber, hapus_state, simpan_debug, state_masih_segar
+
+try:
+    # json_dumps returns UTF-8 bytes; orjson's output needs no decode
+    from orjson import loads as json_loads, dumps as json_dumps
+except ImportError:
+    from json import loads as json_loads
+
+    def json_dumps(obj):
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+# per-follower messages and fatal tracebacks go through here, so LOGLEVEL can quiet them
+logger = logging.getLogger("scrape")
+logger.setLevel(os.environ.get("LOGLEVEL", "INFO").upper())
+if not logger.handlers:
+    logger.addHandler(logging.StreamHandler())
 
 COOKIE_PATHS = [
     "data/www.instagram.com.cookies.json",
@@ -19,187 +46,596 @@ COOKIE_PATHS = [
     "cookies/www.instagram.com.cookies.json",
 ]
 
+STATE_PATH = "data/ig_state.json"
+PROFILE_CACHE_DB = "data/profile_cache.sqlite"
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "font", "media", "manifest", "texttrack", "ping"})
+# images are never decoded, same-site frames stay in one renderer process, nothing is GPU
+# composited and /dev/shm is not used for renderer memory;
+# stylesheets stay enabled because the followers modal only scrolls with its CSS applied
+CHROMIUM_ARGS = ["--no-sandbox", "--blink-settings=imagesEnabled=false", "--disable-features=site-per-process",
+                 "--disable-gpu", "--disable-dev-shm-usage"]
+TELEMETRY_URL_PARTS = ("/logging_client_events", "/ajax/bz", "connect.facebook.net/", "facebook.com/tr")
+# images, fonts, video and telemetry beacons are never needed; documents, scripts and XHR still go through
+block_heavy_resources = buat_pemblokir_sumber(BLOCKED_RESOURCE_TYPES, TELEMETRY_URL_PARTS)
+PROFILE_BASE = "https://www.instagram.com/"
+LOGIN_URL_PREFIX = PROFILE_BASE + "accounts/login"
+FOLLOWERS_LINK_SELS = ('a[href="/{target}/followers/"]', 'a[href$="/followers/"]', 'header a[href*="follower"]')
+FOLLOWERS_LINK_SEL = ", ".join(FOLLOWERS_LINK_SELS)
+# target -> followers-link selector that matched last time, tried first on the next run
+SELECTOR_CACHE_PATH = "data/selectors.json"
+PROFILE_INFO_URL = "https://www.instagram.com/api/v1/users/web_profile_info/?username={}"
+FOLLOWERS_URL = "https://www.instagram.com/api/v1/friendships/{}/followers/"
+IG_APP_ID = "936619743392459"
+# evaluated once against the modal list: the whole scroll loop runs inside the page, collecting
+# usernames from anchor hrefs and scrolling until `limit` names, `maxStagnant` scrolls in a row
+# without a new name, or `maxAttempts` scrolls. Between scrolls it waits for new rows with a
+# MutationObserver; the wait shrinks while rows arrive quickly and grows (to 2s) while they don't.
+JS_COLLECT_FOLLOWERS = """async (el, [limit, maxStagnant, maxAttempts]) => {
+    const seen = new Set();
+    // anchors already read on an earlier pass are skipped without touching their href again
+    const visited = new WeakSet();
+    let stagnant = 0, attempts = 0, wait = 400;
+    const grew = (n) => new Promise(resolve => {
+        const timer = setTimeout(() => { obs.disconnect(); resolve(false); }, wait);
+        const obs = new MutationObserver(() => {
+            if (el.querySelectorAll('a').length > n) { clearTimeout(timer); obs.disconnect(); resolve(true); }
+        });
+        obs.observe(el, {childList: true, subtree: true});
+    });
+    while (seen.size < limit && stagnant < maxStagnant && attempts < maxAttempts) {
+        const before = seen.size;
+        const anchors = el.querySelectorAll('a');
+        for (const a of anchors) {
+            if (visited.has(a)) continue;
+            visited.add(a);
+            const href = a.getAttribute('href');
+            // "/<user>/..." -> "<user>" with one char check and one indexOf, no split array per anchor
+            if (!href || href.charCodeAt(0) !== 47) continue;
+            const end = href.indexOf('/', 1);
+            const u = end === -1 ? href.slice(1) : href.slice(1, end);
+            if (u) seen.add(u);
+        }
+        el.scrollTop = el.scrollTop + el.clientHeight;
+        stagnant = seen.size === before ? stagnant + 1 : 0;
+        attempts++;
+        const more = await grew(anchors.length);
+        wait = more ? Math.max(wait * 0.8, 100) : Math.min(wait * 1.5, 2000);
+    }
+    return Array.from(seen).slice(0, limit);
+}"""
+# browser fallback for one profile, in a single round-trip -> [bio, isPrivate]: the ld+json
+# description (same source scrape_profiles.py falls back to) wins, then the first bio selector
+# with text, then the meta description; the private check runs on body text.
+# The selector list is baked into the source once here instead of being sent with every call
+BIO_SELECTORS = ("div.-vDIg span", "section .-vDIg span", "div[data-testid=user-bio]", "h1 + div > span")
+JS_BIO_AND_PRIVATE = """() => {
+    const sels = %s;
+    let bio = '';
+    const ld = document.querySelector('script[type="application/ld+json"]');
+    if (ld) {
+        try { bio = (JSON.parse(ld.textContent).description || '').trim(); } catch (e) {}
+    }
+    for (let i = 0; !bio && i < sels.length; i++) {
+        bio = Array.from(document.querySelectorAll(sels[i]), n => n.textContent.trim()).filter(Boolean).join(' ');
+    }
+    if (!bio) {
+        const meta = document.querySelector('meta[name="description"]');
+        bio = meta ? (meta.getAttribute('content') || '') : '';
+    }
+    // textContent: no layout pass, unlike innerText over the whole body
+    return [bio, !!document.body && document.body.textContent.includes('This Account is Private')];
+}""" % json.dumps(BIO_SELECTORS)
+# scrolls in a row without a new follower before the modal is considered exhausted
+SCROLL_STAGNANT_LIMIT = int(os.environ.get("SCROLL_STAGNANT_LIMIT", "5"))
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/117 Safari/537.36"
+
+_cookie_cache = {}
+_cookie_dict_cache = {}
+
 def load_cookies():
+    # parsed list is memoized per (path, mtime), so repeat calls skip the read + parse
     for p in COOKIE_PATHS:
         if os.path.exists(p):
+            key = (p, os.path.getmtime(p))
+            if key in _cookie_cache:
+                return _cookie_cache[key]
             try:
-                j = json.load(open(p, encoding="utf-8"))
+                with open(p, "rb") as fh:
+                    j = json_loads(fh.read())
                 if isinstance(j, list):
                     print("Loaded cookies from", p, "entries:", len(j))
+                    _cookie_cache[key] = j
                     return j
             except Exception as e:
                 print("Failed to parse", p, ":", e)
     raise RuntimeError("No cookie list found in: " + ", ".join(COOKIE_PATHS))
 
+def get_requests_cookie_dict():
+    # name -> value view of load_cookies() for requests, built once per parsed list
+    cookies = load_cookies()
+    d = _cookie_dict_cache.get(id(cookies))
+    if d is None:
+        d = _cookie_dict_cache[id(cookies)] = {c["name"]: c["value"] for c in cookies if "name" in c and "value" in c}
+    return d
+
 def cookies_to_playwright_format(cookie_list):
-    out = []
-    for c in cookie_list:
-        if isinstance(c, dict) and "name" in c and "value" in c:
-            cookie = {"name": c["name"], "value": str(c["value"]), "domain": c.get("domain", ".instagram.com")}
-            if "path" in c:
-                cookie["path"] = c["path"]
-            out.append(cookie)
-    return out
+    # single pass straight to Playwright-ready dicts; an empty domain/path from a dump
+    # gets the default too, add_cookies rejects it otherwise
+    return [{"name": c["name"], "value": str(c["value"]),
+             "domain": c.get("domain") or ".instagram.com",
+             "path": c.get("path") or "/",
+             "httpOnly": c.get("httpOnly", False),
+             "secure": c.get("secure", True)}
+            for c in cookie_list
+            if isinstance(c, dict) and "name" in c and "value" in c]
 
 def get_target_username():
     su = os.environ.get("SINGLE_USERNAME")
     if su:
         return su.strip().lstrip("@")
     if os.path.exists("usernames.txt"):
-        with open("usernames.txt","r",encoding="utf-8") as fh:
-            for l in fh:
-                s=l.strip()
-                if s:
-                    return s.lstrip("@")
+        # mmap skips the text wrapper's decode-per-line; only the returned name is decoded
+        with open("usernames.txt","rb") as fh:
+            if os.fstat(fh.fileno()).st_size:
+                with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    for raw in iter(mm.readline, b""):
+                        s = raw.strip()
+                        if s:
+                            return s.decode("utf-8", "ignore").lstrip("@")
     raise RuntimeError("No username provided. Set SINGLE_USERNAME or add usernames.txt")
 
+def get_target_usernames():
+    # TARGETS="a,b,c" fans several targets out over one browser; otherwise the single target as before
+    targets = [t.strip().lstrip("@") for t in os.environ.get("TARGETS", "").split(",") if t.strip()]
+    return list(dict.fromkeys(targets)) or [get_target_username()]
+
+def load_selector_cache():
+    try:
+        with open(SELECTOR_CACHE_PATH, "rb") as fh:
+            cache = json_loads(fh.read())
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+def save_selector_cache(cache):
+    try:
+        with open(SELECTOR_CACHE_PATH, "wb") as fh:
+            fh.write(json_dumps(cache))
+    except OSError as e:
+        logger.warning("Could not save %s: %s", SELECTOR_CACHE_PATH, e)
+
+def remember_selector(target, selector):
+    # re-read right before writing, with no await in between: targets scraped concurrently
+    # run on the one event-loop thread, so each read-modify-write completes before another
+    # target's starts and none of them overwrites an entry saved meanwhile
+    cache = load_selector_cache()
+    cache[target] = selector
+    save_selector_cache(cache)
+
 def ensure_data_dir():
     os.makedirs("data", exist_ok=True)
 
-def save_debug(page, name):
-    ts=int(time.time())
-    safe=name.replace("/","_")
+async def goto_with_retry(page, url, attempts=3, base=1.0, wait_until="domcontentloaded"):
+    # transient navigation failures get exponential backoff with jitter before giving up;
+    # callers that wait for their own selector afterwards pass wait_until="commit"
+    for i in range(attempts):
+        try:
+            return await page.goto(url, wait_until=wait_until)
+        except PWError as e:
+            if i == attempts - 1:
+                raise
+            wait = base * 2 ** i + random.random() * 0.3
+            logger.warning("Navigation to %s failed (%s) - retrying in %.1fs", url, e, wait)
+            await asyncio.sleep(wait)
+
+def make_api_session():
+    # one keep-alive pool for every profile lookup, seeded from the cached cookie file
+    session = requests.Session()
+    retry = Retry(total=3, backoff_factor=1.0, status_forcelist=(500, 502, 503, 504), allowed_methods=("GET",))
+    session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=16, max_retries=retry))
+    session.cookies.update(get_requests_cookie_dict())
+    session.headers.update({"X-IG-App-ID": IG_APP_ID, "User-Agent": USER_AGENT})
+    return session
+
+async def fetch_profile_info_from_page(page, username):
+    # browser fallback, only used when the JSON endpoint refuses us or returns no user
+    info = {"username": username, "biography": "", "is_private": ""}
     try:
-        html = page.content()
-        with open(f"data/debug_{safe}_{ts}.html","w",encoding="utf-8") as fh:
-            fh.write(html)
+        await goto_with_retry(page, PROFILE_BASE + username + "/", wait_until="commit")
+        # the meta tags are in the streamed HTML head, long before the document finishes parsing
+        if not page.url.startswith(LOGIN_URL_PREFIX):
+            await page.wait_for_selector('meta[name="description"], script[type="application/ld+json"]',
+                                         state="attached", timeout=15000)
+        # the login page has a meta description too, which would pass for a public bio; the
+        # blank is_private keeps the row out of the profile cache
+        if page.url.startswith(LOGIN_URL_PREFIX):
+            logger.warning("Login page instead of %s's profile; dropping %s", username, STATE_PATH)
+            hapus_state(STATE_PATH)
+            return info
+        # bio and private flag come back together; only two small values cross CDP
+        info["biography"], info["is_private"] = await page.evaluate(JS_BIO_AND_PRIVATE)
     except Exception as e:
-        print("Failed save html debug:", e)
+        logger.warning("Browser fallback failed for %s: %s", username, e)
+    return info
+
+def fetch_profile_info(session, username):
+    # returns None when the endpoint refuses us or answers without a user (any non-200 but 404,
+    # a body with no data.user) so the caller can use the browser. Rows whose is_private is ""
+    # mean "unknown": they are written but never cached
+    unknown = {"username": username, "biography": "", "is_private": ""}
     try:
-        page.screenshot(path=f"data/debug_{safe}_{ts}.png", full_page=True)
+        r = session.get(PROFILE_INFO_URL.format(username), timeout=30)
+    except requests.RequestException as e:
+        logger.warning("Profile info request failed for %s: %s", username, e)
+        return unknown
+    if r.status_code == 404:
+        # the account does not exist (any more); the browser would not find it either
+        logger.info("web_profile_info returned 404 for %s", username)
+        return unknown
+    if r.status_code != 200:
+        logger.info("web_profile_info returned %s for %s - will retry in browser", r.status_code, username)
+        return None
+    try:
+        user = (json_loads(r.content).get("data") or {}).get("user")
+    except (ValueError, AttributeError):
+        user = None
+    if not isinstance(user, dict):
+        logger.info("web_profile_info had no user for %s - will retry in browser", username)
+        return None
+    return {
+        "username": user.get("username") or username,
+        "biography": user.get("biography") or "",
+        "is_private": bool(user.get("is_private")),
+    }
+
+class ProfileCache:
+    # bio/private per username across runs; entries older than PROFILE_CACHE_TTL seconds are refetched.
+    # One instance is shared by all targets and only touched from the event-loop thread, never from
+    # the fetch pool, so its single connection needs no lock. put() also feeds `fresh`, so a target
+    # that starts its lookups after another has finished reuses its rows; targets running at the
+    # same time split their lists up front and may both fetch a follower they share.
+    def __init__(self, path=PROFILE_CACHE_DB, ttl=None):
+        ttl = float(os.environ.get("PROFILE_CACHE_TTL", "86400")) if ttl is None else ttl
+        self.db = sqlite3.connect(path)
+        self.db.execute("CREATE TABLE IF NOT EXISTS profiles (username TEXT PRIMARY KEY, biography TEXT, is_private INTEGER, ts REAL)")
+        rows = self.db.execute("SELECT username, biography, is_private FROM profiles WHERE ts > ?", (time.time() - ttl,))
+        self.fresh = {u: {"username": u, "biography": b, "is_private": bool(p)} for u, b, p in rows}
+
+    def put(self, username, info):
+        # failed lookups carry is_private == "" and are not worth remembering
+        if isinstance(info["is_private"], bool):
+            self.db.execute("INSERT OR REPLACE INTO profiles VALUES (?, ?, ?, ?)",
+                            (username, info["biography"], int(info["is_private"]), time.time()))
+            self.fresh[username] = info
+
+    def commit(self):
+        self.db.commit()
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+# info dict -> CSV row tuple, done in C instead of a per-row list display
+profile_row = itemgetter("username", "biography", "is_private")
+
+async def fetch_profile_infos(session, page, usernames, writer, cache, pool):
+    # requests.Session is shared by the threads of `pool` (one pool for all targets, so
+    # CONCURRENCY bounds the lookups in flight overall) driven from the event loop;
+    # browser fallbacks run afterwards on the page.
+    # each row goes to writer as soon as it is available instead of being collected first
+    delay = float(os.environ.get("PROFILE_DELAY", "0.8"))
+    # no pause between lookups until the endpoint first refuses one (fetch_profile_info
+    # returns None); from then on every worker keeps PROFILE_DELAY between its requests
+    throttled = threading.Event()
+
+    def worker(uname):
+        started = time.monotonic()
+        info = fetch_profile_info(session, uname)
+        if info is None:
+            throttled.set()
+        if throttled.is_set():
+            # the delay is a gap between request starts, so time spent on the response counts
+            time.sleep(max(0.0, delay * random.uniform(0.5, 1.5) - (time.monotonic() - started)))
+        return info
+
+    written = 0
+    fallback = []
+    fresh = cache.fresh
+    hits = [fresh[u] for u in usernames if u in fresh]
+    to_fetch = [u for u in usernames if u not in fresh]
+    # a warm cache can hold every follower; serialize that batch on a thread so the
+    # event loop is free while the API workers start up
+    loop = asyncio.get_running_loop()
+    hits_written = loop.run_in_executor(None, writer.writerows, map(profile_row, hits))
+    written += len(hits)
+    print("Profile cache hits:", written, "of", len(usernames))
+    futures = [loop.run_in_executor(pool, worker, u) for u in to_fetch]
+    try:
+        # the same writer is used below, so the cached rows must be out first
+        await hits_written
+        for uname, fut in zip(to_fetch, futures):
+            info = await fut
+            if info is None:
+                fallback.append(uname)
+                continue
+            writer.writerow(profile_row(info))
+            cache.put(uname, info)
+            written += 1
+        for uname in fallback:
+            info = await fetch_profile_info_from_page(page, uname)
+            writer.writerow(profile_row(info))
+            cache.put(uname, info)
+            written += 1
+    finally:
+        # lookups still queued in the shared pool would otherwise keep running for a target
+        # that has already failed
+        for fut in futures:
+            fut.cancel()
+        cache.commit()
+    print("Fetched profile info for", written, "followers")
+    return written
+
+def api_get_json(session, url, params=None, attempts=5):
+    # 429s honour Retry-After, otherwise back off exponentially (x2, capped at 60s); 5xx retries live in the adapter
+    backoff = 2.0
+    for _ in range(attempts):
+        r = session.get(url, params=params, timeout=30)
+        if r.status_code != 429:
+            break
+        try:
+            wait = float(r.headers.get("Retry-After") or backoff)
+        except ValueError:
+            wait = backoff
+        logger.info("%s returned 429 - retrying in %ss", url, min(wait, 60))
+        time.sleep(min(wait, 60))
+        backoff = min(backoff * 2, 60)
+    if r.status_code != 200:
+        logger.info("%s returned %s", url, r.status_code)
+        return None
+    try:
+        j = json_loads(r.content)
+    except ValueError:
+        return None
+    # an error payload can be a bare list or string; callers only handle objects
+    if not isinstance(j, dict):
+        logger.info("%s returned a JSON %s instead of an object", url, type(j).__name__)
+        return None
+    return j
+
+def fetch_followers_via_api(session, target, max_followers):
+    # pages through friendships/<uid>/followers/ (~50 per call) instead of scrolling the modal.
+    # None means the API is unusable for this target and the caller should scroll instead.
+    delay = float(os.environ.get("PROFILE_DELAY", "0.8"))
+    try:
+        j = api_get_json(session, PROFILE_INFO_URL.format(target))
+        data = (j or {}).get("data")
+        user = data.get("user") if isinstance(data, dict) else None
+        uid = user.get("id") if isinstance(user, dict) else None
+        if not uid:
+            return None
+        collected = []
+        seen = set()
+        params = {"count": 50}
+        print("Paging followers API for", target, "(uid", uid, ", limit:", max_followers, ")")
+        while len(collected) < max_followers:
+            started = time.monotonic()
+            j = api_get_json(session, FOLLOWERS_URL.format(uid), params)
+            if j is None:
+                if not collected:
+                    return None
+                logger.warning("Followers API stopped after %d entries for %s", len(collected), target)
+                break
+            for u in j.get("users") or ():
+                if not isinstance(u, dict):
+                    continue
+                name = u.get("username")
+                if name and name not in seen:
+                    seen.add(name)
+                    collected.append(name)
+            cursor = j.get("next_max_id")
+            if not cursor:
+                break
+            params["max_id"] = cursor
+            # only the part of the delay not already spent on the request and the page's users
+            time.sleep(max(0.0, delay * random.uniform(0.5, 1.5) - (time.monotonic() - started)))
+    except requests.RequestException as e:
+        logger.warning("Followers API request failed for %s: %s", target, e)
+        return None
+    return collected[:max_followers]
+
+_BROWSER = None
+
+async def get_browser(pw):
+    # one Chromium per process; every target gets its own context on it.
+    # With CDP_URL set (see launch_shared_chromium.sh) several processes share one browser.
+    global _BROWSER
+    if _BROWSER is None:
+        cdp_url = os.environ.get("CDP_URL")
+        if cdp_url:
+            print("Connecting to shared Chromium at", cdp_url)
+            _BROWSER = await pw.chromium.connect_over_cdp(cdp_url)
+        else:
+            _BROWSER = await pw.chromium.launch(headless=True, args=CHROMIUM_ARGS)
+    return _BROWSER
+
+async def close_browser():
+    global _BROWSER
+    if _BROWSER is not None:
+        try:
+            await _BROWSER.close()
+        except Exception:
+            pass
+        _BROWSER = None
+
+async def login_wall(page, target):
+    print("Login page detected (cookies invalid or blocked). Saving debug and exiting.")
+    await simpan_debug(page, target)
+    hapus_state(STATE_PATH)
+    return 1
+
+async def scroll_followers_modal(page, target, max_followers):
+    # browser path: open the followers modal and scroll it. Returns usernames, or an int exit code.
+    url = PROFILE_BASE + target + "/"
+    print("Opening profile:", url)
+    resp = await goto_with_retry(page, url, wait_until="commit")
+    # the navigation response already tells us about a server-side redirect to the login wall
+    # or an error status, before waiting on any selector
+    if resp is not None and resp.url.startswith(LOGIN_URL_PREFIX):
+        return await login_wall(page, target)
+    if resp is not None and resp.status >= 400:
+        print("Profile request failed with HTTP", resp.status, "- saving debug and exiting.")
+        await simpan_debug(page, target)
+        return 1
+    # the selector that found the link on the previous run gets a short head start
+    link_sel = load_selector_cache().get(target)
+    if link_sel:
+        try:
+            await page.wait_for_selector(link_sel, state="attached", timeout=2000)
+        except PWError:
+            link_sel = None
+    if not link_sel:
+        # instead of a fixed 1.5s pause, continue as soon as either the followers link or the login form exists
+        try:
+            await page.wait_for_selector(FOLLOWERS_LINK_SEL.format(target=target) + ', input[name="username"]',
+                                         state="attached", timeout=15000)
+        except PWError:
+            pass  # handled below: login check, then the missing-link path
+    # a client-side redirect only shows up in page.url, which is read locally without a round trip
+    if page.url.startswith(LOGIN_URL_PREFIX):
+        return await login_wall(page, target)
+    # Find followers button/link in header
+    # The count is often in a link: a[href="/<user>/followers/"]
+    try:
+        # CSS-only compound selector: matched through the selector engine in one pass,
+        # without the text filter's walk over every anchor's rendered text
+        if not link_sel:
+            # remember which alternative matched so the next run can try it first
+            link_sel = await page.evaluate("sels => sels.find(s => document.querySelector(s)) || null",
+                                           [s.format(target=target) for s in FOLLOWERS_LINK_SELS])
+            if link_sel:
+                remember_selector(target, link_sel)
+        follow_link = page.locator(link_sel or FOLLOWERS_LINK_SEL.format(target=target)).first
+        if await follow_link.count() == 0:
+            print("Could not find followers link/button. Saving debug.")
+            await simpan_debug(page, target)
+            return 2
+        print("Clicking followers link...")
+        await follow_link.click()
     except Exception as e:
-        print("Failed save png debug:", e)
-    print("Saved debug artifacts for", name)
+        print("Exception clicking followers link:", e)
+        await simpan_debug(page, target)
+        return 3
 
-def scrape_followers_of(target, max_followers=1000):
-    ensure_data_dir()
-    cookies = load_cookies()
-    playwright_cookies = cookies_to_playwright_format(cookies)
-    with sync_playwright() as pw:
-        browser = pw.chromium.launch(headless=True, args=["--no-sandbox"])
-        context = browser.new_context()
+    # Wait for modal with role=dialog and inner ul list of followers; returns once the first row is in
+    modal_sel = 'div[role="dialog"] ul'
+    try:
+        await page.wait_for_selector(modal_sel + " a", state="attached", timeout=10000)
+    except Exception as e:
+        print("Followers modal did not appear:", e)
+        await simpan_debug(page, target)
+        return 4
+
+    list_el = page.locator(modal_sel).first
+    print("Start scrolling modal to collect followers (limit:", max_followers, ")")
+    # one round-trip for the whole scroll loop instead of a read, scroll and wait per tick
+    return await list_el.evaluate(JS_COLLECT_FOLLOWERS, [max_followers, SCROLL_STAGNANT_LIMIT, 400])
+
+async def scrape_followers_of(browser, target, playwright_cookies, max_followers=1000, cache=None, pool=None):
+    if state_masih_segar(STATE_PATH, COOKIE_PATHS):
+        print("Reusing storage state from", STATE_PATH)
+        context = await browser.new_context(storage_state=STATE_PATH, service_workers="block")
+    else:
+        context = await browser.new_context(service_workers="block")
         try:
-            context.add_cookies(playwright_cookies)
+            await context.add_cookies(playwright_cookies)
         except Exception as e:
             print("Warning: add_cookies failed:", e)
-        page = context.new_page()
-        page.set_default_navigation_timeout(60000)
-        try:
-            url = f"https://www.instagram.com/{target}/"
-            print("Opening profile:", url)
-            page.goto(url, wait_until="domcontentloaded")
-            page.wait_for_timeout(1500)
-            # Detect login page
-            if "Log in" in page.title() or "Login" in page.title():
-                print("Login page detected (cookies invalid or blocked). Saving debug and exiting.")
-                save_debug(page, target)
-                return 1
-            # Find followers button/link in header
-            # The count is often in a link: a[href="/<user>/followers/"]
-            try:
-                follow_link = page.locator(f'a[href="/{target}/followers/"]').first
-                if follow_link.count() == 0:
-                    # fallback: find link with text 'followers'
-                    follow_link = page.locator('a').filter(has_text='followers').first
-                if follow_link.count() == 0:
-                    print("Could not find followers link/button. Saving debug.")
-                    save_debug(page, target)
-                    return 2
-                print("Clicking followers link...")
-                follow_link.click()
-            except Exception as e:
-                print("Exception clicking followers link:", e)
-                save_debug(page, target)
-                return 3
-
-            # Wait for modal with role=dialog and inner ul list of followers
-            modal_sel = 'div[role="dialog"] ul'
-            try:
-                page.wait_for_selector(modal_sel, timeout=10000)
-            except Exception as e:
-                print("Followers modal did not appear:", e)
-                save_debug(page, target)
-                return 4
-
-            list_el = page.locator(modal_sel).first
-            # Scroll the modal to load followers. Use evaluate to scroll inside the element.
-            collected = set()
-            prev_count = 0
-            attempts = 0
-            print("Start scrolling modal to collect followers (limit:", max_followers, ")")
-            while len(collected) < max_followers and attempts < 400:
-                # collect visible usernames in modal items: often li a[href="/<user>/"] with div > div > div > span
-                items = list_el.locator('a').all_text_contents()
-                # items as text may include full names etc; instead find anchors href -> extract username from href attribute
-                anchors = list_el.locator('a')
-                n = anchors.count()
-                for i in range(n):
-                    try:
-                        href = anchors.nth(i).get_attribute("href") or ""
-                        # href may be like "/username/"
-                        if href.startswith("/"):
-                            parts = href.strip("/").split("/")
-                            if parts:
-                                u = parts[0]
-                                if u and u not in collected:
-                                    collected.add(u)
-                    except Exception:
-                        continue
-
-                # scroll
-                page.evaluate("""(sel) => {
-                    const el = document.querySelector(sel);
-                    if (!el) return 0;
-                    el.scrollTop = el.scrollTop + el.clientHeight;
-                    return el.scrollTop;
-                }""", modal_sel)
-                page.wait_for_timeout(400)
-                attempts += 1
-                if len(collected) == prev_count:
-                    # if no growth after some attempts, increase wait
-                    if attempts % 10 == 0:
-                        page.wait_for_timeout(800)
-                prev_count = len(collected)
-                if len(collected) >= max_followers:
-                    break
-
-            result_list = list(collected)[:max_followers]
-            print("Collected", len(result_list), "followers (capped to max).")
-            # write CSV
-            out_csv = f"data/followers_{target}.csv"
-            with open(out_csv, "w", encoding="utf-8", newline="") as fh:
-                import csv
-                w = csv.writer(fh)
+    # (service workers are blocked above: requests they serve would bypass this route)
+    await context.route("**/*", block_heavy_resources)
+    page = await context.new_page()
+    page.set_default_navigation_timeout(60000)
+    session = make_api_session()
+    try:
+        result_list = None
+        if os.environ.get("FOLLOWERS_VIA_API", "1") == "1":
+            # the requests-based pager blocks, so it runs on a worker thread
+            result_list = await asyncio.to_thread(fetch_followers_via_api, session, target, max_followers)
+        if result_list is None:
+            result_list = await scroll_followers_modal(page, target, max_followers)
+            if isinstance(result_list, int):
+                return result_list
+        print("Collected", len(result_list), "followers (capped to max).")
+        # write CSV
+        out_csv = f"data/followers_{target}.csv"
+        with closing(open(out_csv, "w", encoding="utf-8", newline="", buffering=65536)) as fh:
+            w = csv.writer(fh)
+            if os.environ.get("FETCH_PROFILE_INFO") == "1":
+                w.writerow(["username", "biography", "is_private"])
+                await fetch_profile_infos(session, page, result_list, w, cache, pool)
+            else:
                 w.writerow(["username"])
-                for u in result_list:
-                    w.writerow([u])
-            print("Saved", out_csv)
-            return 0
+                w.writerows((u,) for u in result_list)
+        print("Saved", out_csv)
+        try:
+            await context.storage_state(path=STATE_PATH)
         except Exception as e:
-            print("Fatal exception:", e)
-            traceback.print_exc()
-            try:
-                save_debug(page, target)
-            except Exception:
-                pass
-            return 99
+            print("Warning: could not save storage state:", e)
+        return 0
+    except Exception as e:
+        logger.exception("Fatal exception: %s", e)
+        try:
+            await simpan_debug(page, target)
+        except Exception:
+            pass
+        return 99
+    finally:
+        session.close()
+        try:
+            await context.close()
+        except Exception:
+            pass
+
+async def main(targets, maxf):
+    playwright_cookies = cookies_to_playwright_format(load_cookies())
+    rc = 0
+    # shared by every target: one sqlite connection for the profile cache and one bounded
+    # thread pool for the profile lookups
+    cache = pool = None
+    async with async_playwright() as pw:
+        try:
+            if os.environ.get("FETCH_PROFILE_INFO") == "1":
+                cache = ProfileCache()
+                pool = ThreadPoolExecutor(max_workers=max(1, int(os.environ.get("CONCURRENCY", "8"))))
+            # one Chromium launch for every target; each target gets its own context, and up to
+            # TARGET_CONCURRENCY of them are scraped at the same time
+            browser = await get_browser(pw)
+            sem = asyncio.Semaphore(max(1, int(os.environ.get("TARGET_CONCURRENCY", "1"))))
+
+            async def run_target(target):
+                async with sem:
+                    return await scrape_followers_of(browser, target, playwright_cookies, maxf, cache, pool)
+
+            # the first failing target (in TARGETS order) decides the exit code, as before
+            for target_rc in await asyncio.gather(*map(run_target, targets)):
+                if isinstance(target_rc, int) and target_rc and not rc:
+                    rc = target_rc
         finally:
-            try:
-                context.close()
-                browser.close()
-            except Exception:
-                pass
+            await close_browser()
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+            if cache is not None:
+                cache.close()
+    return rc
 
 if __name__ == "__main__":
-    target = get_target = None
     try:
-        target = get_target_username()
+        targets = get_target_usernames()
     except Exception as e:
         print("Error getting target username:", e)
         sys.exit(2)
     try:
         maxf = int(os.environ.get("MAX_FOLLOWERS", "1000"))
-    except:
+    except ValueError:
         maxf = 1000
-    rc = scrape_followers_of(target, maxf)
-    sys.exit(rc if isinstance(rc, int) else 0)
+    ensure_data_dir()
+    sys.exit(asyncio.run(main(targets, maxf)))
@@ -2,12 +2,35 @@
 # scrape_profiles.py
 # Usage: expects cookie JSON at data/www.instagram.com.cookies.json (or env SINGLE_USERNAME / usernames.txt)
 # Writes: data/results.csv and data/results.jsonl
-# Saves debug artifacts on errors: data/debug_<username>_<ts>.html/.png
+# BROWSER_FALLBACK=0 keeps the run API-only: Chromium is never started, and usernames the
+# API refuses stay out of the checkpoint so a later run picks them up again
+# PW_PROFILE_DIR=data/pw_profile keeps the fallback browser's profile (cookies, HTTP cache) on disk
+# between runs; cookies are only injected while that profile has none yet
+# Saves debug artifacts on errors: data/debug_<username>_<ts>.html/.png (viewport screenshot;
+# SCREENSHOT_FULL_PAGE=true for the whole page). Only the first DEBUG_MAX_ARTIFACTS (default 20)
+# failures per run are captured, and DEBUG_ARTIFACTS=0 turns capture off
 
-import os, sys, json, time, csv, traceback
+import os, sys, json, time, csv, random, asyncio, hashlib, functools, itertools, sqlite3, traceback
+import aiohttp
+from operator import itemgetter
 from pathlib import Path
-from typing import List
-from playwright.sync_api import sync_playwright, TimeoutError as PWTimeout
+from playwright.async_api import async_playwright, Error as PWError, TimeoutError as PWTimeout
+from pyinstadump.utilitas import buat_pemblokir_sumber, hapus_state, simpan_debug, state_masih_segar
+
+try:
+    # json_dumps returns UTF-8 bytes for the binary JSONL file; orjson's output needs no decode
+    from orjson import loads as json_loads, dumps as json_dumps
+except ImportError:
+    from json import loads as json_loads
+
+    def json_dumps(obj):
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+try:
+    # libuv-backed loop: cheaper per-await scheduling for the many concurrent API lookups
+    import uvloop
+except ImportError:
+    uvloop = None
 
 COOKIE_PATHS = [
     "data/www.instagram.com.cookies.json",
@@ -15,15 +38,37 @@ COOKIE_PATHS = [
     "cookies/www.instagram.com.cookies.json",
 ]
 
+# profile pages are only read through the DOM, so stylesheets can go as well; the web app
+# manifest, subtitle tracks and sendBeacon pings are never used either
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "font", "media", "stylesheet", "manifest", "texttrack", "ping"})
+# images are never decoded, same-site frames stay in one renderer process, nothing is GPU
+# composited, and the small /dev/shm of CI containers is not used for renderer memory
+CHROMIUM_ARGS = ["--no-sandbox", "--disable-setuid-sandbox",
+                 "--blink-settings=imagesEnabled=false", "--disable-features=site-per-process",
+                 "--disable-gpu", "--disable-dev-shm-usage"]
+TELEMETRY_URL_PARTS = ("/logging_client_events", "/ajax/bz", "connect.facebook.net/", "facebook.com/tr")
+# images, stylesheets, fonts, video and telemetry beacons are never needed; documents, scripts and XHR still go through
+block_heavy_resources = buat_pemblokir_sumber(BLOCKED_RESOURCE_TYPES, TELEMETRY_URL_PARTS)
+PROFILE_BASE = "https://www.instagram.com/"
+LOGIN_URL_PREFIX = PROFILE_BASE + "accounts/login"
+LEGACY_PROFILE_PARAMS = {"__a": "1", "__d": "dis"}
+# where the user object sits in each JSON shape, as fixed key paths (web_profile_info first, then ?__a=1)
+USER_PATHS = (("data", "user"), ("graphql", "user"))
+PROFILE_INFO_URL = "https://www.instagram.com/api/v1/users/web_profile_info/?username={}"
+IG_APP_ID = "936619743392459"
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/117 Safari/537.36"
 OUT_CSV = "data/results.csv"
 OUT_JSONL = "data/results.jsonl"
+CHECKPOINT_DB = "data/checkpoint.sqlite"
+# same file scrape_followers.py saves its logged-in browser state to
+STATE_PATH = "data/ig_state.json"
 
 def load_cookies_from_files():
     for p in COOKIE_PATHS:
         if os.path.exists(p):
             try:
-                with open(p, encoding="utf-8") as fh:
-                    j = json.load(fh)
+                with open(p, "rb") as fh:
+                    j = json_loads(fh.read())
                 if isinstance(j, list):
                     print("Loaded cookies from", p, "entries:", len(j))
                     return j
@@ -38,8 +83,18 @@ def load_cookies_from_env():
     raw = os.environ.get("COOKIES_SECRET") or os.environ.get("COOKIES")
     if not raw:
         return None
+    # secrets pasted with surrounding text or shell quoting: parse only the [...] span, once;
+    # literal "\n" sequences between tokens are only unescaped if that parse fails
+    lb, rb = raw.find("["), raw.rfind("]")
+    if lb < 0 or rb < lb:
+        print("COOKIES_SECRET env does not contain a JSON list")
+        return None
+    candidate = raw[lb:rb + 1]
     try:
-        j = json.loads(raw)
+        try:
+            j = json_loads(candidate)
+        except ValueError:
+            j = json_loads(candidate.replace("\\n", "\n"))
         if isinstance(j, list):
             print("Loaded cookies from COOKIES_SECRET env, entries:", len(j))
             return j
@@ -47,81 +102,131 @@ def load_cookies_from_env():
         print("Failed to parse COOKIES_SECRET env as JSON:", e)
     return None
 
-def ensure_cookie_domains(cookie_list):
-    # Some cookie dumps are missing domain for each cookie; Playwright needs domain key
+def cookies_to_playwright_format(cookie_list):
+    # one pass per cookie: Playwright wants name/value plus domain and path (dumps often miss them),
+    # and an int 'expires' where the dump has 'expiry'
     out = []
     for c in cookie_list:
-        if not isinstance(c, dict):
+        if not isinstance(c, dict) or "name" not in c or "value" not in c:
             continue
-        cc = dict(c)  # copy
-        # If domain missing, set to .instagram.com
-        if "domain" not in cc or not cc["domain"]:
-            cc["domain"] = ".instagram.com"
-        # Playwright wants 'path' too (default '/')
-        if "path" not in cc or not cc["path"]:
-            cc["path"] = "/"
-        # convert expiry to int if present
-        if "expiry" in cc and not isinstance(cc["expiry"], int):
+        cookie = {"name": c["name"], "value": str(c["value"]),
+                  "domain": c.get("domain") or ".instagram.com", "path": c.get("path") or "/"}
+        expiry = c.get("expiry")
+        if expiry is not None:
             try:
-                cc["expiry"] = int(cc["expiry"])
-            except Exception:
-                del cc["expiry"]
-        out.append(cc)
+                cookie["expires"] = int(expiry)
+            except (TypeError, ValueError):
+                pass
+        out.append(cookie)
     return out
 
-def cookies_to_playwright_format(cookie_list):
-    # Playwright expects dicts with 'name' and 'value' (domain/path helpful)
-    out = []
-    for c in cookie_list:
-        if not isinstance(c, dict):
-            continue
-        if "name" in c and "value" in c:
-            cookie = {"name": c["name"], "value": str(c["value"])}
-            if "domain" in c:
-                cookie["domain"] = c["domain"]
-            if "path" in c:
-                cookie["path"] = c["path"]
-            if "expiry" in c:
-                cookie["expires"] = c["expiry"]
-            out.append(cookie)
-    return out
+def unique_usernames(lines):
+    # a repeated name would be scraped by two workers at once; the set keeps dedup linear.
+    # Usernames are case-insensitive, so "Foo" and "foo" are one profile (first spelling kept)
+    seen = set()
+    for l in lines:
+        u = l.strip()
+        key = u.lower()
+        if u and key not in seen:
+            seen.add(key)
+            yield u
+
+@functools.lru_cache(maxsize=1)
+def _load_cookies_cached(source_key):
+    # one parse + normalisation per distinct cookie source; source_key changes with the files or env
+    cookie_list = load_cookies_from_files() or load_cookies_from_env()
+    if not cookie_list:
+        raise RuntimeError("No cookies provided. Create data/www.instagram.com.cookies.json or set COOKIES_SECRET env.")
+    playwright_cookies = tuple(cookies_to_playwright_format(cookie_list))
+    cookie_header = "; ".join("{}={}".format(c["name"], c["value"]) for c in playwright_cookies)
+    return playwright_cookies, cookie_header
 
-def read_usernames():
+def load_cookies():
+    """Returns (playwright_cookies, cookie_header), cached until a cookie file or COOKIES_SECRET changes."""
+    raw = os.environ.get("COOKIES_SECRET") or os.environ.get("COOKIES") or ""
+    mtimes = tuple(os.path.getmtime(p) if os.path.exists(p) else None for p in COOKIE_PATHS)
+    return _load_cookies_cached((hashlib.sha1(raw.encode("utf-8")).hexdigest(), mtimes))
+
+def iter_usernames():
+    # streamed line by line, so the first lookup starts before a large file has been read;
+    # usernames.txt wins if it has any names, data/usernames.txt is the fallback
     su = os.environ.get("SINGLE_USERNAME")
     if su:
-        return [su.strip()]
-    if os.path.exists("usernames.txt"):
-        with open("usernames.txt", "r", encoding="utf-8") as fh:
-            lines = [l.strip() for l in fh if l.strip() and not l.strip().startswith("#")]
-            if lines:
-                return lines
-    if os.path.exists("data/usernames.txt"):
-        with open("data/usernames.txt", "r", encoding="utf-8") as fh:
-            return [l.strip() for l in fh if l.strip()]
+        yield su.strip()
+        return
+    for path, comments in (("usernames.txt", True), ("data/usernames.txt", False)):
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as fh:
+                found = False
+                for u in unique_usernames(l for l in fh if not (comments and l.strip().startswith("#"))):
+                    found = True
+                    yield u
+                if found:
+                    return
     raise RuntimeError("No usernames found. Provide usernames.txt or set SINGLE_USERNAME env var.")
 
 def ensure_data_dir():
     os.makedirs("data", exist_ok=True)
 
-def save_debug(name, page):
-    ts = int(time.time())
-    safe = name.replace("/", "_")
-    try:
-        html = page.content()
-        with open(f"data/debug_{safe}_{ts}.html", "w", encoding="utf-8") as fh:
-            fh.write(html)
-    except Exception as e:
-        print("Failed to save debug html:", e)
-    try:
-        page.screenshot(path=f"data/debug_{safe}_{ts}.png", full_page=True)
-    except Exception as e:
-        print("Failed to save debug png:", e)
-    print("Saved debug artifacts for", name, "-> data/debug_%s_%d.{html,png}" % (safe, ts))
+# Same selectors the header scrape always used, tried in order, read inside the page.
+# Field -> selectors for every text field; JS_PROFILE_FIELDS is generated from this once at import,
+# with each fallback chain unrolled into `querySelector(a) || querySelector(b)`.
+PROFILE_TEXT_SELECTORS = {
+    "username": ("header h2", "header h1", "header ._aa_c"),
+    "full_name": ("header section h1", "header section div.-vDIg span"),
+    "biography": ("header section div.-vDIg span", "header section div.-vDIg", "div.-vDIg > span"),
+}
+
+def _first_match_js(selectors):
+    return " || ".join("document.querySelector({})".format(json.dumps(s)) for s in selectors)
+
+# The ld+json text and meta description for the page-source fallback come back in the
+# same message, so a short bio never costs a second round-trip.
+JS_PROFILE_FIELDS = """() => {
+    const text = el => el ? (el.innerText || '').trim() : null;
+    const ogImg = document.querySelector('meta[property="og:image"]');
+    const img = ogImg ? null : document.querySelector('header img');
+    const ld = document.querySelector('script[type="application/ld+json"]');
+    const meta = %s;
+    return {
+%s
+        // private flag: if there's text like 'This Account is Private'. textContent, unlike
+        // innerText, does not force a layout pass to build the whole page's rendered text
+        is_private: !!document.body && document.body.textContent.includes('This Account is Private'),
+        // verified: presence of svg with aria-label 'Verified' or a span with verified
+        is_verified: !!(%s),
+        // profile pic - og:image / meta property or header img
+        profile_pic_url: ogImg ? ogImg.getAttribute('content') : (img ? img.getAttribute('src') : null),
+        ld_json: ld ? ld.textContent : null,
+        meta_description: meta ? meta.getAttribute('content') : null,
+    };
+}""" % (
+    _first_match_js(('meta[name="description"]', 'meta[property="og:description"]')),
+    "\n".join("        {}: text({}),".format(field, _first_match_js(sels)) for field, sels in PROFILE_TEXT_SELECTORS.items()),
+    _first_match_js(('svg[aria-label="Verified"]', 'header span[title*="Verified"]')),
+)
+# Installed once per context as an init script, so each profile only sends this short call
+# instead of the whole extractor source; null if the page never got the script.
+JS_INSTALL_PROFILE_FIELDS = "window.__igProfileFields = " + JS_PROFILE_FIELDS + ";"
+JS_CALL_PROFILE_FIELDS = "() => window.__igProfileFields ? window.__igProfileFields() : null"
+
+async def with_retry(coro_factory, attempts=3, base=1.0):
+    # transient navigation failures (timeouts, ERR_NETWORK_CHANGED, ...) get exponential backoff with jitter
+    for i in range(attempts):
+        try:
+            return await coro_factory()
+        except PWError as e:
+            if i == attempts - 1:
+                raise
+            wait = base * 2 ** i + random.random() * 0.3
+            print("Retrying in {:.1f}s after: {}".format(wait, e))
+            await asyncio.sleep(wait)
 
-def extract_profile_from_dom(page):
+async def extract_profile_from_dom(page):
     """
     Primary extraction: wait for header DOM and read biography from header.
     Common Instagram DOM: header -> section -> div -> span (the bio)
+    Returns (profile fields, (ld+json text, meta description)) from a single evaluate.
     """
     data = {
         "username": None,
@@ -131,156 +236,593 @@ def extract_profile_from_dom(page):
         "is_verified": None,
         "profile_pic_url": None,
     }
+    source = (None, None)
     try:
-        # Wait for header section where profile info appears
-        page.wait_for_selector("header", timeout=8000)
-        # username
-        username_el = page.query_selector("header h2") or page.query_selector("header h1") or page.query_selector("header ._aa_c")
-        if username_el:
-            data["username"] = (username_el.inner_text() or "").strip()
-        # full name
-        full_el = page.query_selector("header section h1") or page.query_selector("header section div.-vDIg span")
-        if full_el:
-            data["full_name"] = (full_el.inner_text() or "").strip()
-        # biography: usually inside header section: header section div.-vDIg > span (first or second)
-        bio_el = page.query_selector("header section div.-vDIg span") or page.query_selector("header section div.-vDIg") or page.query_selector('div.-vDIg > span')
-        if bio_el:
-            data["biography"] = (bio_el.inner_text() or "").strip()
-        # private / verified
-        # private flag: if there's text like 'This Account is Private'
-        if page.query_selector('h2:has-text("This Account is Private")') or "This Account is Private" in page.content():
-            data["is_private"] = True
-        else:
-            data["is_private"] = False
-        # verified: presence of svg with aria-label 'Verified' or a span with verified
-        if page.query_selector('svg[aria-label="Verified"]') or page.query_selector('header span[title*="Verified"]'):
-            data["is_verified"] = True
-        else:
-            data["is_verified"] = False
-        # profile pic - og:image / meta property or header img
-        og_img = page.query_selector('meta[property="og:image"]')
-        if og_img:
-            data["profile_pic_url"] = og_img.get_attribute("content")
-        else:
-            img = page.query_selector("header img")
-            if img:
-                data["profile_pic_url"] = img.get_attribute("src")
+        # Wait for header section where profile info appears (the budget covers the HTML download too)
+        await page.wait_for_selector("header", timeout=15000)
     except PWTimeout:
         print("Timeout waiting for header DOM.")
+    try:
+        # every field in one round-trip instead of a query_selector await per element;
+        # still read after a header timeout, the page source may carry the fallback fields.
+        # Cheaper than page.content() + an HTML parser: only a few short strings cross the
+        # connection, not the whole serialized document
+        fields = await page.evaluate(JS_CALL_PROFILE_FIELDS) or await page.evaluate(JS_PROFILE_FIELDS)
+        source = (fields.pop("ld_json"), fields.pop("meta_description"))
+        data.update(fields)
     except Exception as e:
         print("DOM extraction error:", e)
-    return data
+    return data, source
 
-def fallback_extract_from_page_source(page):
-    # fallback: try application/ld+json or meta description
-    data = {}
+class TokenBucket:
+    """
+    Global pacing for Instagram requests: `rate` acquisitions per second, bursts of up to `burst`.
+    Concurrent workers share it, so parallelism never exceeds the configured request rate.
+    After slow_down(), every `recover_after` seconds without another one doubles the rate again,
+    up to the configured one.
+    """
+
+    def __init__(self, rate, burst, recover_after=60.0):
+        self.rate = rate
+        self.burst = burst
+        self.recover_after = recover_after
+        self._base_rate = rate
+        self._tokens = burst
+        self._last = time.monotonic()
+        self._slowed_at = self._last
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if self.rate < self._base_rate and now - self._slowed_at >= self.recover_after:
+                    self.rate = min(self._base_rate, self.rate * 2)
+                    self._slowed_at = now
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return self
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def slow_down(self):
+        # halve the rate when Instagram pushes back; never below one request per 5s.
+        # Restarts the recovery cooldown
+        self.rate = max(self.rate / 2, 0.2)
+        self._slowed_at = time.monotonic()
+
+def make_api_session(cookie_header):
+    # plain HTTP client for web_profile_info, sending the same cookies the browser gets.
+    # Keep-alive connections are reused across lookups and per-host sockets are capped.
+    connector = aiohttp.TCPConnector(limit=256, limit_per_host=64, ttl_dns_cache=300, keepalive_timeout=60)
+    return aiohttp.ClientSession(connector=connector,
+                                 headers={"X-IG-App-ID": IG_APP_ID, "User-Agent": USER_AGENT, "Cookie": cookie_header},
+                                 timeout=aiohttp.ClientTimeout(total=30))
+
+async def fetch_profile_from_api(session, limiter, username, attempts=5):
+    """
+    Fast path: the web_profile_info JSON endpoint over aiohttp.
+    No browser involved at all. Returns None if refused, so the caller can fall back to the DOM.
+    429/401 slow the shared limiter down and are retried after Retry-After or an exponential backoff;
+    connection errors and timeouts are retried on the same backoff.
+    """
+    backoff = 2.0
+    user = None
+    for _ in range(attempts):
+        wait = None
+        try:
+            async with limiter, session.get(PROFILE_INFO_URL.format(username)) as r:
+                if r.headers.get("x-ratelimit-remaining") == "0":
+                    limiter.slow_down()
+                if r.status in (401, 429):
+                    limiter.slow_down()
+                    try:
+                        wait = float(r.headers.get("Retry-After") or backoff)
+                    except ValueError:
+                        wait = backoff
+                elif r.status != 200:
+                    print("Profile API returned", r.status, "for", username)
+                    return None
+                else:
+                    user = find_user(json_loads(await r.read())) or {}
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print("Profile API error for", username, ":", e)
+            wait = backoff
+        except Exception as e:
+            print("Profile API error for", username, ":", e)
+            return None
+        if wait is None:
+            break
+        print("Profile API throttled for", username, "- retrying in", min(wait, 60), "s")
+        await asyncio.sleep(min(wait, 60) + random.random() * 0.3)
+        backoff = min(backoff * 2, 60)
+    if not user:
+        return None
+    return profile_from_user(user, username)
+
+async def fetch_profile_from_legacy_api(session, limiter, username):
+    """
+    Second JSON source for usernames web_profile_info refused: the profile page's own
+    ?__a=1&__d=dis JSON. One attempt, no retries; a login redirect, a non-JSON body or any
+    error returns None and the caller moves on to the browser.
+    """
     try:
-        ld = page.query_selector('script[type="application/ld+json"]')
-        if ld:
-            raw = ld.inner_text()
-            parsed = json.loads(raw)
+        async with limiter, session.get(PROFILE_BASE + username + "/", params=LEGACY_PROFILE_PARAMS,
+                                        allow_redirects=False) as r:
+            if r.status != 200 or "json" not in r.headers.get("Content-Type", ""):
+                print("Legacy profile JSON returned", r.status, "for", username)
+                return None
+            j = json_loads(await r.read())
+    except Exception as e:
+        print("Legacy profile JSON error for", username, ":", e)
+        return None
+    user = find_user(j)
+    return profile_from_user(user, username) if user else None
+
+def find_user(obj, paths=USER_PATHS):
+    # first path that resolves to a dict; plain key lookups, no selector parsing per call
+    for path in paths:
+        o = obj
+        for key in path:
+            o = o.get(key) if type(o) is dict else None
+        if type(o) is dict:
+            return o
+    return None
+
+def profile_from_user(user, username):
+    return {
+        "username": user.get("username") or username,
+        "full_name": user.get("full_name"),
+        "biography": user.get("biography") or "",
+        "is_private": bool(user.get("is_private")),
+        "is_verified": bool(user.get("is_verified")),
+        "profile_pic_url": user.get("profile_pic_url_hd") or user.get("profile_pic_url"),
+    }
+
+def profile_has_fields(profile):
+    # the username alone is always filled in (from the target), so it does not count
+    return any(profile.get(k) for k in ("full_name", "biography", "profile_pic_url", "is_verified", "is_private"))
+
+def find_ld_person(root):
+    # the Person node may sit at the top, under mainEntity / author, or inside an @graph list;
+    # walked with an explicit stack (no recursion) and exact type checks, stopping at the first match
+    stack = [root]
+    while stack:
+        o = stack.pop()
+        t = type(o)
+        if t is dict:
+            if o.get("@type") == "Person":
+                return o
+            stack.extend(o.values())
+        elif t is list:
+            stack.extend(o)
+    return root if type(root) is dict else {}
+
+def fallback_extract_from_page_source(ld_raw, meta_content):
+    # fallback: application/ld+json or meta description, as read by extract_profile_from_dom
+    data = {}
+    if ld_raw:
+        try:
+            parsed = find_ld_person(json_loads(ld_raw))
             data["full_name"] = parsed.get("name")
             data["biography"] = parsed.get("description")
             data["profile_pic_url"] = parsed.get("image")
-    except Exception:
-        pass
-    try:
-        meta_desc = page.query_selector('meta[name="description"]') or page.query_selector('meta[property="og:description"]')
-        if meta_desc:
-            data["biography"] = data.get("biography") or meta_desc.get_attribute("content")
-    except Exception:
-        pass
+        except Exception:
+            pass
+    if meta_content:
+        data["biography"] = data.get("biography") or meta_content
     return data
 
-def write_results_row(row):
-    # write CSV header first if not exists
-    header = ["username","full_name","biography","is_private","is_verified","profile_pic_url"]
-    exists = os.path.exists(OUT_CSV)
-    with open(OUT_CSV, "a", newline="", encoding="utf-8") as fh:
-        writer = csv.writer(fh)
-        if not exists:
-            writer.writerow(header)
-        writer.writerow([row.get(h) for h in header])
-    with open(OUT_JSONL, "a", encoding="utf-8") as fh:
-        fh.write(json.dumps(row, ensure_ascii=False) + "\n")
-
-def main():
-    ensure_data_dir()
-    cookie_list = load_cookies_from_files() or load_cookies_from_env()
-    if not cookie_list:
-        raise RuntimeError("No cookies provided. Create data/www.instagram.com.cookies.json or set COOKIES_SECRET env.")
+class ResultsWriter:
+    """
+    Keeps results.csv and results.jsonl open for the whole run and appends rows through
+    the normal file buffers, flushing every `flush_every` rows and on close.
+    write() only queues the row; a single sink task writes whatever has queued up in one
+    executor call, so workers never stall the event loop on file I/O. A username is only
+    marked in the checkpoint once its row has been flushed, so a killed run never skips
+    a profile that did not reach the files.
+    """
 
-    cookie_list = ensure_cookie_domains(cookie_list)
-    playwright_cookies = cookies_to_playwright_format(cookie_list)
+    FIELDS = ("username", "full_name", "biography", "is_private", "is_verified", "profile_pic_url")
+    # profile dict -> CSV row tuple in FIELDS order, done in C; every producer (API user,
+    # DOM extraction) fills all six keys
+    _csv_row = staticmethod(itemgetter(*FIELDS))
 
-    usernames = read_usernames()
-    print("Will scrape {} user(s)".format(len(usernames)))
+    def __init__(self, csv_path=OUT_CSV, jsonl_path=OUT_JSONL, checkpoint=None, flush_every=32):
+        self._csv_fh = open(csv_path, "a", newline="", encoding="utf-8", buffering=1 << 20)
+        self._jsonl_fh = open(jsonl_path, "ab", buffering=1 << 20)
+        self._writer = csv.writer(self._csv_fh)
+        # write CSV header first if the file is new or empty; append mode opens at the end,
+        # so the position is the size without separate exists/getsize calls
+        if self._csv_fh.tell() == 0:
+            self._writer.writerow(self.FIELDS)
+        self._checkpoint = checkpoint
+        self._flush_every = flush_every
+        self._unflushed = []  # (target, row) written but not yet flushed
+        self._queue = asyncio.Queue()
+        self._sink_task = asyncio.get_running_loop().create_task(self._sink())
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True, args=["--no-sandbox", "--disable-setuid-sandbox"])
-        context = browser.new_context(viewport={"width":1280,"height":800})
-        # add cookies to context
+    def write(self, row, target=None):
+        # a dead sink would otherwise leave rows piling up in the queue unnoticed
+        if self._sink_task.done():
+            raise self._sink_task.exception() or RuntimeError("ResultsWriter is closed")
+        self._queue.put_nowait((target or row.get("username"), row))
+
+    def _write_rows(self, rows, flush):
+        # runs in the executor
+        # csv.writer already writes None as an empty field
+        self._writer.writerows(map(self._csv_row, rows))
+        self._jsonl_fh.write(b"".join(json_dumps(row) + b"\n" for row in rows))
+        if flush:
+            self._csv_fh.flush()
+            self._jsonl_fh.flush()
+
+    def _mark_flushed(self):
+        # rows without any extracted field (login wall, empty DOM) are written but stay
+        # unmarked, so the next run tries those usernames again
+        if self._checkpoint is not None:
+            for target, row in self._unflushed:
+                if profile_has_fields(row):
+                    self._checkpoint.mark(target, row)
+        self._unflushed.clear()
+
+    def _close_files(self):
+        # close() flushes; calling it again on a closed file is a no-op
         try:
-            context.add_cookies(playwright_cookies)
-            print("Added {} cookies to browser context".format(len(playwright_cookies)))
-        except Exception as e:
-            print("Failed to add cookies to context:", e)
+            self._csv_fh.close()
+        finally:
+            self._jsonl_fh.close()
 
-        page = context.new_page()
-        # set a common UA
-        page.set_extra_http_headers({"User-Agent":"Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/117 Safari/537.36"})
+    async def _sink(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                while not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                done = None in batch
+                items = [item for item in batch if item is not None]
+                if items:
+                    self._unflushed.extend(items)
+                    flush = len(self._unflushed) >= self._flush_every
+                    await loop.run_in_executor(None, self._write_rows, [row for _, row in items], flush)
+                    if flush:
+                        self._mark_flushed()
+                if done:
+                    break
+        finally:
+            # also on failure or cancellation, so rows already buffered still reach the files
+            self._close_files()
+        # the tail is only marked once the files closed cleanly
+        self._mark_flushed()
 
-        for target in usernames:
-            url = f"https://www.instagram.com/{target}/"
-            print("Visiting", url)
-            try:
-                page.goto(url, timeout=30000)
-                # wait a bit for JS to populate
-                try:
-                    page.wait_for_timeout(1200)
-                except Exception:
-                    pass
-
-                # Primary attempt: read from DOM header
-                profile = extract_profile_from_dom(page)
-                # If biography is short or None, try fallback
-                bio = (profile.get("biography") or "").strip()
-                if not bio or len(bio) < 10:
-                    fallback = fallback_extract_from_page_source(page)
-                    for k,v in fallback.items():
-                        if v and not profile.get(k):
-                            profile[k] = v
-
-                # if username missing, set from target
-                if not profile.get("username"):
-                    profile["username"] = target
-
-                print("Extracted:", {k: profile.get(k) for k in ["username","full_name","biography","is_private","is_verified","profile_pic_url"]})
-                write_results_row(profile)
+    async def close(self):
+        # drain whatever is still queued; the sink flushes, closes and marks the tail, and
+        # re-raises here if it failed
+        if not self._sink_task.done():
+            self._queue.put_nowait(None)
+        try:
+            await self._sink_task
+        finally:
+            # the sink's own finally never runs if it was cancelled before its first step
+            self._close_files()
 
-            except Exception as e:
-                print("Error scraping", target, ":", e)
-                try:
-                    save_debug(target, page)
-                except Exception as dbg_e:
-                    print("Failed to save debug artifacts:", dbg_e)
-            finally:
-                # small polite delay (env-controlled)
-                delay = float(os.environ.get("PROFILE_DELAY", "0.8"))
-                time.sleep(delay)
+class Checkpoint:
+    """
+    Usernames already scraped, kept in sqlite so a killed run resumes where it stopped.
+    Commits are batched every `commit_every` rows to keep fsyncs off the hot path.
+    `added` counts usernames newly marked by this run.
+    """
+
+    def __init__(self, path=CHECKPOINT_DB, commit_every=25):
+        self._db = sqlite3.connect(path)
+        self._db.execute("CREATE TABLE IF NOT EXISTS profiles (username TEXT PRIMARY KEY, full_name TEXT, biography TEXT,"
+                         " is_private INTEGER, is_verified INTEGER, profile_pic_url TEXT)")
+        self.done = {u for (u,) in self._db.execute("SELECT username FROM profiles")}
+        self._commit_every = commit_every
+        self._pending = 0
+        self.added = 0
+
+    def mark(self, username, profile):
+        self._db.execute("INSERT OR REPLACE INTO profiles VALUES (?, ?, ?, ?, ?, ?)",
+                         (username, profile.get("full_name"), profile.get("biography"),
+                          profile.get("is_private"), profile.get("is_verified"), profile.get("profile_pic_url")))
+        if username not in self.done:
+            self.added += 1
+        self.done.add(username)
+        self._pending += 1
+        if self._pending >= self._commit_every:
+            self._db.commit()
+            self._pending = 0
+
+    def reset(self):
+        self._db.execute("DELETE FROM profiles")
+        self._db.commit()
+        self.done.clear()
+
+    def close(self):
+        self._db.commit()
+        self._db.close()
+
+async def scrape_profile(page, target, results):
+    url = PROFILE_BASE + target + "/"
+    print("Visiting", url)
+    try:
+        # only wait for the navigation to commit: extract_profile_from_dom waits for the header
+        # element itself, which is all we read, instead of the whole document parse
+        await with_retry(lambda: page.goto(url, timeout=30000, wait_until="commit"))
+        # a server-side redirect shows up in page.url right after commit, a client-side one only
+        # after the header wait; page.url is read locally, so checking both costs nothing
+        if page.url.startswith(LOGIN_URL_PREFIX):
+            return await login_wall(page, target)
+
+        # Primary attempt: read from DOM header
+        profile, source = await extract_profile_from_dom(page)
+        if page.url.startswith(LOGIN_URL_PREFIX):
+            return await login_wall(page, target)
+        # If biography is short or None, try fallback. Not for private accounts: their page
+        # source has no Person data, and the meta description is only the follower-count blurb
+        bio = (profile.get("biography") or "").strip()
+        if not profile.get("is_private") and (not bio or len(bio) < 10):
+            fallback = fallback_extract_from_page_source(*source)
+            for k,v in fallback.items():
+                if v and not profile.get(k):
+                    profile[k] = v
 
+        # if username missing, set from target
+        if not profile.get("username"):
+            profile["username"] = target
+
+        print("Extracted:", {k: profile.get(k) for k in ["username","full_name","biography","is_private","is_verified","profile_pic_url"]})
+        results.write(profile, target)
+        return profile
+
+    except Exception as e:
+        print("Error scraping", target, ":", e)
         try:
-            context.close()
-        except Exception:
-            pass
+            await simpan_debug(page, target)
+        except Exception as dbg_e:
+            print("Failed to save debug artifacts:", dbg_e)
+    return None
+
+async def login_wall(page, target):
+    # nothing is written for the username, so it stays out of the checkpoint; the saved state
+    # (shared with scrape_followers.py) evidently no longer logs in, so it is dropped
+    print("Login page detected for", target, "(cookies invalid or blocked); dropping", STATE_PATH)
+    hapus_state(STATE_PATH)
+    await simpan_debug(page, target)
+    return None
+
+_PLAYWRIGHT = None
+_BROWSER = None
+
+async def get_browser():
+    # one Chromium per process, kept warm across batches and only started when first needed;
+    # with CDP_URL set (see launch_shared_chromium.sh) runs attach to a long-lived one instead
+    global _PLAYWRIGHT, _BROWSER
+    if _BROWSER is None:
+        if _PLAYWRIGHT is None:
+            _PLAYWRIGHT = await async_playwright().start()
+        cdp_url = os.environ.get("CDP_URL")
+        if cdp_url:
+            print("Connecting to shared Chromium at", cdp_url)
+            _BROWSER = await _PLAYWRIGHT.chromium.connect_over_cdp(cdp_url)
+        else:
+            _BROWSER = await _PLAYWRIGHT.chromium.launch(headless=True, args=CHROMIUM_ARGS)
+    return _BROWSER
+
+async def launch_persistent_context(profile_dir):
+    # returns (context, needs_cookies); the context owns its own Chromium, closed with the context
+    global _PLAYWRIGHT
+    if _PLAYWRIGHT is None:
+        _PLAYWRIGHT = await async_playwright().start()
+    # a killed run leaves Chromium's profile lock behind and the next launch would refuse the profile
+    Path(profile_dir, "SingletonLock").unlink(missing_ok=True)
+    # the supplied cookies go in again whenever they may be newer than what the profile holds:
+    # no cookie DB yet, a cookie file touched since the DB was last written, or cookies that
+    # come from COOKIES_SECRET (no file, so no mtime to compare)
+    cookie_dbs = [Path(profile_dir, "Default", "Cookies"), Path(profile_dir, "Default", "Network", "Cookies")]
+    db_mtimes = [st.st_mtime for st in (p.stat() for p in cookie_dbs if p.exists()) if st.st_size > 0]
+    file_mtimes = [os.path.getmtime(p) for p in COOKIE_PATHS if os.path.exists(p)]
+    needs_cookies = not db_mtimes or not file_mtimes or max(file_mtimes) > max(db_mtimes)
+    print("Using persistent browser profile", profile_dir)
+    ctx = await _PLAYWRIGHT.chromium.launch_persistent_context(
+        profile_dir, headless=True, args=CHROMIUM_ARGS, viewport={"width":1280,"height":800}, user_agent=USER_AGENT,
+        service_workers="block")
+    return ctx, needs_cookies
+
+async def close_browser():
+    # for a CDP browser this only disconnects; the shared Chromium keeps running
+    global _PLAYWRIGHT, _BROWSER
+    if _BROWSER is not None:
         try:
-            browser.close()
+            await _BROWSER.close()
         except Exception:
             pass
+        _BROWSER = None
+    if _PLAYWRIGHT is not None:
+        await _PLAYWRIGHT.stop()
+        _PLAYWRIGHT = None
+
+async def scrape_batch(session, limiter, results, playwright_cookies, usernames, concurrency, api_concurrency,
+                       browser_fallback=True):
+    # the JSON API serves the happy path; the browser and a fresh context for this batch
+    # are only brought up when the first username needs the DOM fallback
+    context = None
+    context_lock = asyncio.Lock()
+    state_saved = False
+    pages = asyncio.Queue()
+    opened = []
+
+    async def get_context():
+        nonlocal context
+        async with context_lock:
+            if context is None:
+                profile_dir = os.environ.get("PW_PROFILE_DIR")
+                if profile_dir and not os.environ.get("CDP_URL"):
+                    ctx, needs_cookies = await launch_persistent_context(profile_dir)
+                    if needs_cookies:
+                        await ctx.add_cookies(playwright_cookies)
+                        print("Added {} cookies to new browser profile".format(len(playwright_cookies)))
+                elif state_masih_segar(STATE_PATH, COOKIE_PATHS):
+                    # the saved state already carries the cookie jar, so nothing to add
+                    print("Reusing storage state from", STATE_PATH)
+                    ctx = await (await get_browser()).new_context(viewport={"width":1280,"height":800}, user_agent=USER_AGENT,
+                                                                  service_workers="block", storage_state=STATE_PATH)
+                else:
+                    ctx = await (await get_browser()).new_context(viewport={"width":1280,"height":800}, user_agent=USER_AGENT,
+                                                                  service_workers="block")
+                    # add cookies to context
+                    try:
+                        await ctx.add_cookies(playwright_cookies)
+                        print("Added {} cookies to browser context".format(len(playwright_cookies)))
+                    except Exception as e:
+                        print("Failed to add cookies to context:", e)
+                context = ctx
+                ctx.set_default_timeout(30000)
+                # service workers are blocked on every context: requests a worker serves never
+                # reach the route below, and the scraper has no use for the offline cache
+                await ctx.route("**/*", block_heavy_resources)
+                await ctx.add_init_script(JS_INSTALL_PROFILE_FIELDS)
+        return context
+
+    try:
+        # pages in the shared context are opened on first need (API misses only), up to one per
+        # slot, and recycled through a queue; the semaphore bounds in-flight profiles
+        sem = asyncio.Semaphore(concurrency)
+
+        async def acquire_page():
+            if pages.empty() and len(opened) < concurrency:
+                page = await (await get_context()).new_page()
+                opened.append(page)
+                return page
+            return await pages.get()
+
+        # a fixed pool of workers drains one shared username iterator (no task per username);
+        # JSON lookups are cheap, so the pool is API_CONCURRENCY wide and only refusals take a
+        # browser page. next() never yields to the loop, so each name goes to exactly one worker
+        targets = iter(usernames)
+
+        async def process(target):
+            nonlocal state_saved
+            profile = await fetch_profile_from_api(session, limiter, target)
+            if not profile and os.environ.get("LEGACY_PROFILE_JSON", "1") == "1":
+                profile = await fetch_profile_from_legacy_api(session, limiter, target)
+            if profile:
+                print("Extracted:", profile)
+                results.write(profile, target)
+            elif not browser_fallback:
+                print("API lookup failed for", target, "- browser fallback disabled, leaving it for the next run")
+            else:
+                async with sem:
+                    page = await acquire_page()
+                    try:
+                        async with limiter:
+                            profile = await scrape_profile(page, target, results)
+                    finally:
+                        pages.put_nowait(page)
+                if profile and profile_has_fields(profile) and not state_saved:
+                    # after the first profile with real fields from the browser the session is known good;
+                    # later runs start from this state instead of re-adding cookies
+                    state_saved = True
+                    try:
+                        await context.storage_state(path=STATE_PATH)
+                    except Exception as e:
+                        print("Warning: could not save storage state:", e)
+
+        async def worker():
+            for target in targets:
+                # one failing username (e.g. the browser refusing to start) is logged and left
+                # unmarked for the next run instead of tearing down the whole pool
+                try:
+                    await process(target)
+                except Exception as e:
+                    print("Error processing", target, ":", e)
+
+        await asyncio.gather(*(worker() for _ in range(api_concurrency)))
+    finally:
+        for page in opened:
+            try:
+                await page.close()
+            except Exception:
+                pass
+        if context is not None:
+            try:
+                await context.close()
+            except Exception:
+                pass
+
+async def main():
+    ensure_data_dir()
+    playwright_cookies, cookie_header = load_cookies()
+
+    names = iter_usernames()
+    # raises right away when there are no usernames at all, before the checkpoint db is opened
+    first = next(names)
+    skipped = queued = 0
+
+    def pending():
+        nonlocal skipped, queued
+        for u in itertools.chain((first,), names):
+            if u in checkpoint.done:
+                skipped += 1
+            else:
+                queued += 1
+                yield u
+
+    concurrency = max(1, int(os.environ.get("PROFILE_CONCURRENCY", "8")))
+    api_concurrency = max(1, int(os.environ.get("API_CONCURRENCY", "32")))
+    max_rps = float(os.environ.get("MAX_RPS", "4"))
+    limiter = TokenBucket(max_rps, max(1.0, float(os.environ.get("RATE_BURST", str(2 * max_rps)))),
+                          recover_after=float(os.environ.get("RATE_RECOVERY_SECONDS", "60")))
+    print("Scraping usernames with up to {} page(s)".format(concurrency))
+
+    # RESUME=0 starts over; otherwise usernames finished by an earlier (killed) run are skipped.
+    # A run that gets through every pending username clears the checkpoint, so the next run
+    # with the same input scrapes everything again instead of skipping it all. Opened last, so
+    # a bad setting above cannot leave the connection open
+    checkpoint = Checkpoint()
+    if os.environ.get("RESUME", "1") != "1":
+        checkpoint.reset()
+    try:
+        results = ResultsWriter(checkpoint=checkpoint)
+    except BaseException:
+        checkpoint.close()
+        raise
+    finished = complete = False
+    try:
+        async with make_api_session(cookie_header) as session:
+            try:
+                await scrape_batch(session, limiter, results, playwright_cookies,
+                                   pending(), concurrency, api_concurrency,
+                                   browser_fallback=os.environ.get("BROWSER_FALLBACK", "1") != "0")
+                finished = True
+            finally:
+                await close_browser()
+    finally:
+        try:
+            # rows are only marked once flushed, so completeness is known after close()
+            await results.close()
+            complete = finished and checkpoint.added == queued
+            if complete:
+                checkpoint.reset()
+        finally:
+            checkpoint.close()
+    if skipped:
+        print("Resumed: skipped {} user(s) already in {}".format(skipped, CHECKPOINT_DB))
+    if complete:
+        print("All usernames done; cleared", CHECKPOINT_DB)
+    else:
+        print("{} of {} user(s) still pending in {}; the next run resumes with them".format(
+            queued - checkpoint.added, queued, CHECKPOINT_DB))
 
 if __name__ == "__main__":
     try:
-        main()
+        (uvloop.run if uvloop else asyncio.run)(main())
         print("Done. Wrote:", OUT_CSV, OUT_JSONL)
     except Exception as e:
         print("Fatal error:", e)
@@ -0,0 +1,31 @@
+import pytest
+
+pytest.importorskip("playwright")
+
+from pyinstadump.pengikis import _parse_jumlah
+
+
+@pytest.mark.parametrize("teks, hasil", [
+    ("1,234 followers", (1234, True)),
+    ("1.234 Follower", (1234, True)),
+    ("1.234.567 pengikut", (1234567, True)),
+    ("987 followers", (987, True)),
+    ("12345 followers", (12345, True)),
+    ("1,234 mengikuti", (1234, True)),
+    ("12.3 rb pengikut", (12300, False)),
+    ("12,3 rb pengikut", (12300, False)),
+    ("1,2 jt pengikut", (1200000, False)),
+    ("12,3 Tsd. Follower", (12300, False)),
+    ("1,5 Mio. Follower", (1500000, False)),
+    ("1.234 Mio. Follower", (1234000, False)),
+    ("12,3 mil seguidores", (12300, False)),
+    ("1.2K followers", (1200, False)),
+    ("3M followers", (3000000, False)),
+    ("1.1B followers", (1100000000, False)),
+    ("12,3 followers", (None, False)),
+    ("followers", (None, False)),
+    ("", (None, False)),
+    (None, (None, False)),
+])
+def test_parse_jumlah(teks, hasil):
+    assert _parse_jumlah(teks) == hasil